@@ -0,0 +1,79 @@
+"""
+Authority dashboard figures, cached per jurisdiction.
+
+Authorities sharing a ward and zone see the same counts, category
+breakdown and hotspots, so these are computed once per jurisdiction and
+kept in the cache together with the jurisdiction's generation
+(``issues.caching.get_jurisdiction_generation``), which every write to an
+issue there bumps.
+
+An entry whose generation is current is served as is. A stale entry is
+still served for up to ``DASHBOARD_CACHE_MAX_STALENESS`` seconds after it
+was computed, while the one request that takes the recompute lock brings
+it up to date. Past that bound, or without an entry, requests wait on
+the one computing it instead of all querying the database at once.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from issues.caching import get_jurisdiction_generation
+
+# Seconds the recompute lock is held at most, should its holder die
+LOCK_TIMEOUT = 30
+# Seconds a request waits on another one computing an entry, and how often
+# it looks
+WAIT_TIMEOUT = 5
+WAIT_INTERVAL = 0.05
+
+
+def _key(name, ward, zone):
+    digest = hashlib.md5(f'{ward}\0{zone}'.encode()).hexdigest()
+    return f'dashboard:{name}:{digest}'
+
+
+def _compute(key, generation, compute):
+    value = compute()
+    # Stored under the generation read before computing, so a write made
+    # meanwhile leaves the entry stale
+    cache.set(key, (generation, time.time(), value), settings.DASHBOARD_CACHE_TIMEOUT)
+    return value
+
+
+def _compute_once(key, generation, compute):
+    if not cache.add(f'{key}:lock', 1, LOCK_TIMEOUT):
+        return None
+    try:
+        return _compute(key, generation, compute)
+    finally:
+        cache.delete(f'{key}:lock')
+
+
+def cached_figures(name, ward, zone, compute):
+    """
+    ``compute()`` for the authorities of ``ward`` and ``zone`` (either may
+    be blank), from the cache when it is current or stale within bounds.
+    """
+    key = _key(name, ward, zone)
+    generation = get_jurisdiction_generation(ward, zone)
+    entry = cache.get(key)
+    if entry is not None:
+        entry_generation, computed_at, value = entry
+        if entry_generation == generation:
+            return value
+        if time.time() - computed_at <= settings.DASHBOARD_CACHE_MAX_STALENESS:
+            refreshed = _compute_once(key, generation, compute)
+            return value if refreshed is None else refreshed
+
+    refreshed = _compute_once(key, generation, compute)
+    if refreshed is not None:
+        return refreshed
+    # Someone else is computing it: wait for their result, not for the database
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        current = cache.get(key)
+        if current is not None and (entry is None or current[1] > entry[1]):
+            return current[2]
+    return _compute(key, generation, compute)
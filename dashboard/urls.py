@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path('', views.authority_dashboard, name='authority_dashboard'),
     path('issue/<int:pk>/manage/', views.manage_issue, name='manage_issue'),
+    path('issues/manage/', views.bulk_manage_issues, name='bulk_manage_issues'),
 ]
\ No newline at end of file
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.gis.admin import OSMGeoAdmin
 from .models import (
-    IssueCategory, Issue, IssueUpvote, 
+    Boundary, IssueCategory, Issue, IssueUpvote, 
     IssueComment, IssueStatusUpdate, AffectedUser
 )
 
@@ -10,6 +10,12 @@ class IssueCategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug']
     prepopulated_fields = {'slug': ('name',)}
 
+@admin.register(Boundary)
+class BoundaryAdmin(OSMGeoAdmin):
+    list_display = ['name', 'kind', 'updated_at']
+    list_filter = ['kind']
+    search_fields = ['name']
+
 @admin.register(Issue)
 class IssueAdmin(OSMGeoAdmin):
     list_display = ['title', 'category', 'status', 'reporter', 'created_at', 'upvotes']
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .api_views import IssueViewSet, IssueCategoryViewSet, IssueCommentViewSet
 
 router = DefaultRouter()
@@ -8,5 +9,8 @@ router.register(r'categories', IssueCategoryViewSet, basename='category')
 router.register(r'comments', IssueCommentViewSet, basename='comment')
 
 urlpatterns = [
+    path('async/issues/<int:pk>/', async_views.issue_detail, name='async_issue_detail'),
+    path('async/issues/map_data/', async_views.map_data, name='async_map_data'),
+    path('async/issues/statistics/', async_views.statistics, name='async_issue_statistics'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
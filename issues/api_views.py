@@ -1,28 +1,77 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.contrib.gis.geos import Point, Polygon
+from django.db.models import Count
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Issue, IssueCategory, IssueComment, IssueUpvote, AffectedUser
+from locallens.throttling import limit_concurrency
+import numpy as np
+from . import geohash
+from .caching import CachedResponseMixin, conditional_cached
+from .clustering import cluster_issues, count_by_cell
+from .columnar import cluster_columns, issue_columns
+from .duplicates import find_similar_issues
+from .exporters import CONTENT_TYPES, ExportFormatError, export_issues
+from .fastpath import ISSUE_ROWS, MAP_ROWS
+from .filters import IssueFilterSet, IssueSearchFilter
+from .heatmap import WEIGHTINGS, band_for_zoom, unpack_cells
+from .importers import ImportFormatError, detect_format, import_issues, parse
+from .models import Issue, IssueCategory, IssueComment, AffectedUser, HeatmapGrid
 from .serializers import (
     IssueSerializer, IssueCategorySerializer, 
-    IssueCommentSerializer, IssueMapSerializer
+    IssueCommentSerializer, IssueMapSerializer, BulkTransitionSerializer
 )
+from .pagination import CommentCursorPagination, IssueCursorPagination, KeysetPaginationMixin
+from .renderers import ColumnarRenderer
+from .spatial import check_zoom, parse_bbox
+from .sync import changes_since
+from .transitions import transition_issues
+from .upvotes import toggle_upvote
+
+def _int_param(params, name, default=None):
+    value = params.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: f'{name} must be an integer'})
+
 
 class IssueCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = IssueCategory.objects.all()
     serializer_class = IssueCategorySerializer
 
 
-class IssueViewSet(viewsets.ModelViewSet):
+class IssueViewSet(CachedResponseMixin, KeysetPaginationMixin, viewsets.ModelViewSet):
     queryset = Issue.objects.filter(is_duplicate=False).select_related('category', 'reporter')
     serializer_class = IssueSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'status', 'ward', 'zone']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, IssueSearchFilter]
+    filterset_class = IssueFilterSet
+    # Matched through Issue.search_vector, not one ILIKE per field
     search_fields = ['title', 'description', 'address']
     ordering_fields = ['created_at', 'upvotes', 'status']
     ordering = ['-created_at']
+    cursor_pagination_class = IssueCursorPagination
+    # Endpoint classes for locallens.throttling, by action
+    throttle_scopes = {
+        'create': 'report',
+        'upvote': 'vote',
+        'mark_affected': 'vote',
+        'statistics': 'expensive',
+        'export': 'expensive',
+        'bulk_import': 'expensive',
+        'bulk_transition': 'expensive',
+    }
+    # Loaded whatever ?fields= asks for, as keyset cursors read them
+    sparse_fieldset_columns = ['created_at', 'upvotes']
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -31,34 +80,118 @@ class IssueViewSet(viewsets.ModelViewSet):
         if not self.request.user.is_authenticated or not self.request.user.is_authority:
             queryset = queryset.filter(privacy='public')
         
+        if self.action in ('list', 'retrieve'):
+            serializer_class = self.get_serializer_class()
+            fields = serializer_class.requested_fields(self.request.query_params)
+            queryset = serializer_class.restrict_queryset(queryset, fields, self.sparse_fieldset_columns)
+        
         return queryset
     
+    def _use_fast_path(self):
+        # The browsable API renders forms from the serializer, so keeps it
+        return settings.ISSUE_API_FAST_PATH and self.request.accepted_renderer.format == 'json'
+    
+    @conditional_cached
+    def list(self, request, *args, **kwargs):
+        if not self._use_fast_path():
+            return super().list(request, *args, **kwargs)
+        
+        encoder = ISSUE_ROWS.restrict(self.get_serializer_class().requested_fields(request.query_params))
+        issues = encoder.values(self.filter_queryset(self.get_queryset()), ['id', *self.sparse_fieldset_columns])
+        page = self.paginate_queryset(issues)
+        if page is not None:
+            return self.get_paginated_response(encoder.encode(page, request))
+        return Response(encoder.encode(issues, request))
+    
+    @conditional_cached
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
-        serializer.save(reporter=self.request.user)
+        duplicate_of = serializer.validated_data.get('duplicate_of')
+        if duplicate_of:
+            serializer.save(reporter=self.request.user, is_duplicate=True, status='duplicate')
+        else:
+            serializer.save(reporter=self.request.user)
+    
+    @action(detail=False, methods=['post'], url_path='import', url_name='import',
+            permission_classes=[IsAuthenticated], parser_classes=[MultiPartParser])
+    @limit_concurrency('expensive')
+    def bulk_import(self, request):
+        if not (request.user.is_authority or request.user.is_staff):
+            raise PermissionDenied('Only authority and partner accounts can import issues')
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Upload a GeoJSON, CSV or NDJSON file'})
+        
+        try:
+            file_format = request.data.get('format') or detect_format(upload.name)
+            rows = parse(upload.file, file_format)
+        except ImportFormatError as exc:
+            raise ValidationError({'format': str(exc)})
+        
+        summary = import_issues(rows, request.user)
+        return Response(summary, status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    @limit_concurrency('expensive')
+    def export(self, request):
+        # ?format= is taken by DRF's renderer negotiation
+        file_format = request.query_params.get('export_format', 'csv')
+        issues = self.filter_queryset(self.get_queryset())
+        try:
+            chunks = export_issues(issues, file_format)
+        except ExportFormatError as exc:
+            raise ValidationError({'export_format': str(exc)})
+        
+        response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[file_format])
+        response['Content-Disposition'] = f'attachment; filename="issues.{file_format}"'
+        return response
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    @limit_concurrency('expensive')
+    def bulk_transition(self, request):
+        if not request.user.is_authority:
+            raise PermissionDenied('Only authorities can change issue status')
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        # Same jurisdiction as the authority dashboard
+        issues = self.get_queryset().filter(pk__in=data['ids'])
+        if request.user.ward:
+            issues = issues.filter(ward=request.user.ward)
+        if request.user.zone:
+            issues = issues.filter(zone=request.user.zone)
+        
+        updated = transition_issues(issues, data['status'], request.user, data['note'])
+        return Response({
+            'updated': updated,
+            'unchanged': sorted(set(data['ids']) - set(updated)),
+        })
+    
+    @action(detail=False, methods=['get'])
+    def similar(self, request):
+        params = request.query_params
+        try:
+            location = Point(float(params['lng']), float(params['lat']), srid=4326)
+            category = int(params['category'])
+        except (KeyError, ValueError):
+            raise ValidationError('lat, lng and category are required numbers')
+        
+        candidates = find_similar_issues(
+            self.get_queryset(), location, category, params.get('text', '')
+        )
+        return Response(candidates)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def upvote(self, request, pk=None):
         issue = self.get_object()
-        upvote, created = IssueUpvote.objects.get_or_create(
-            issue=issue, 
-            user=request.user
-        )
-        
-        if not created:
-            upvote.delete()
-            issue.upvotes -= 1
-            issue.save()
-            return Response({
-                'status': 'removed',
-                'upvotes': issue.upvotes
-            })
-        else:
-            issue.upvotes += 1
-            issue.save()
-            return Response({
-                'status': 'added',
-                'upvotes': issue.upvotes
-            })
+        added, upvotes = toggle_upvote(issue, request.user)
+        return Response({
+            'status': 'added' if added else 'removed',
+            'upvotes': upvotes
+        })
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def mark_affected(self, request, pk=None):
@@ -70,23 +203,172 @@ class IssueViewSet(viewsets.ModelViewSet):
         
         if not created:
             affected.delete()
+        # The signals keep affected_count current; no need to recount
+        issue.refresh_from_db(fields=['affected_count'])
+        return Response({
+            'status': 'added' if created else 'removed',
+            'count': issue.affected_count
+        })
+    
+    @action(detail=False, methods=['get'],
+            renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarRenderer])
+    @conditional_cached
+    def map_data(self, request):
+        issues = self.filter_queryset(self.get_queryset())
+        is_columnar = request.accepted_renderer.format == ColumnarRenderer.format
+        
+        params = request.query_params
+        if not {'zoom', 'bbox', 'limit'} & set(params.keys()):
+            if is_columnar:
+                return Response(self._columnar_points(issues, mode='points'))
+            results, _ = self._map_results(issues)
+            return Response(results)
+        
+        # Served from the GiST index on Issue.location
+        if params.get('bbox'):
+            try:
+                envelope = Polygon.from_bbox(parse_bbox(params['bbox']))
+            except ValueError as e:
+                raise ValidationError({'bbox': str(e)})
+            envelope.srid = 4326
+            issues = issues.filter(location__bboverlaps=envelope)
+        
+        # Aggregate at low zoom so the payload is bounded by the grid, not the data
+        zoom = _int_param(params, 'zoom')
+        if zoom is not None:
+            try:
+                check_zoom(zoom)
+            except ValueError as e:
+                raise ValidationError({'zoom': str(e)})
+        if zoom is not None and zoom <= settings.ISSUE_CLUSTER_MAX_ZOOM:
+            clusters = cluster_issues(issues, zoom)
+            if is_columnar:
+                return Response({'mode': 'clusters', 'zoom': zoom, 'columns': cluster_columns(clusters)})
             return Response({
-                'status': 'removed',
-                'count': issue.affected_users.count()
+                'mode': 'clusters',
+                'zoom': zoom,
+                'clusters': clusters,
             })
+        
+        limit = _int_param(params, 'limit', settings.ISSUE_MAP_DEFAULT_LIMIT)
+        limit = max(1, min(limit, settings.ISSUE_MAP_MAX_LIMIT))
+        
+        # Most relevant first, with id as a tie-breaker so pages are stable
+        issues = issues.order_by('-upvotes', '-created_at', '-id')
+        if is_columnar:
+            return Response(self._columnar_points(issues, limit, mode='points', zoom=zoom))
+        
+        results, truncated = self._map_results(issues, limit)
+        return Response({
+            'mode': 'points',
+            'zoom': zoom,
+            'count': len(results),
+            'truncated': truncated,
+            'results': results,
+        })
+    
+    def _map_results(self, issues, limit=None):
+        # Also reports whether more than limit issues matched
+        fields = IssueMapSerializer.requested_fields(self.request.query_params)
+        fast = self._use_fast_path()
+        if fast:
+            encoder = MAP_ROWS.restrict(fields)
+            issues = encoder.values(issues)
         else:
-            return Response({
-                'status': 'added',
-                'count': issue.affected_users.count()
-            })
+            issues = IssueMapSerializer.restrict_queryset(issues, fields)
+        
+        if limit is not None:
+            issues = issues[:limit + 1]
+        issues = list(issues)
+        truncated = limit is not None and len(issues) > limit
+        issues = issues[:limit]
+        
+        if fast:
+            return encoder.encode(issues, self.request), truncated
+        return IssueMapSerializer(issues, many=True, context=self.get_serializer_context()).data, truncated
+    
+    def _columnar_points(self, issues, limit=None, **meta):
+        # Details are fetched per issue on click, so only marker fields are sent
+        statuses = [code for code, _ in Issue.STATUS_CHOICES]
+        categories = list(IssueCategory.objects.values_list('id', 'name'))
+        columns, truncated = issue_columns(issues, statuses, categories, limit)
+        return {
+            **meta,
+            'truncated': truncated,
+            'statuses': statuses,
+            'categories': [name for _, name in categories],
+            'columns': columns,
+        }
     
     @action(detail=False, methods=['get'])
-    def map_data(self, request):
+    def sync(self, request):
+        limit = _int_param(request.query_params, 'limit', settings.ISSUE_SYNC_PAGE_SIZE)
+        limit = max(1, min(limit, settings.ISSUE_SYNC_MAX_PAGE_SIZE))
+        try:
+            changed, removed, cursor, has_more, reset = changes_since(
+                self.get_queryset(),
+                request.query_params.get('cursor'),
+                limit,
+                include_private=request.user.is_authenticated and request.user.is_authority,
+            )
+        except ValueError as e:
+            raise ValidationError({'cursor': str(e)})
+        
+        return Response({
+            'reset': reset,
+            'changed': self.get_serializer(changed, many=True).data,
+            'removed': removed,
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def density(self, request):
+        precision = _int_param(request.query_params, 'precision', 5)
+        if not 1 <= precision <= geohash.MAX_PRECISION:
+            raise ValidationError({'precision': f'precision must be between 1 and {geohash.MAX_PRECISION}'})
         issues = self.filter_queryset(self.get_queryset())
-        serializer = IssueMapSerializer(issues, many=True)
-        return Response(serializer.data)
+        return Response(count_by_cell(issues, precision))
+    
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        params = request.query_params
+        zoom = _int_param(params, 'zoom', settings.LEAFLET_CONFIG['DEFAULT_ZOOM'])
+        weighting = params.get('weight', 'count')
+        if weighting not in WEIGHTINGS:
+            raise ValidationError({'weight': f"weight must be one of {', '.join(WEIGHTINGS)}"})
+        
+        # Grids are precomputed by the build_heatmaps task from public issues
+        grid = HeatmapGrid.objects.filter(
+            band=band_for_zoom(zoom),
+            weighting=weighting,
+            category_id=_int_param(params, 'category'),
+        ).first()
+        if grid is None:
+            return Response({'bounds': None, 'points': []})
+        
+        indices, values = unpack_cells(grid.cells, grid.max_value)
+        cell = max(grid.east - grid.west, grid.north - grid.south) / max(grid.rows, grid.cols)
+        lat = grid.south + (indices // grid.cols + 0.5) * cell
+        lng = grid.west + (indices % grid.cols + 0.5) * cell
+        
+        if params.get('bbox'):
+            try:
+                west, south, east, north = parse_bbox(params['bbox'])
+            except ValueError as e:
+                raise ValidationError({'bbox': str(e)})
+            inside = (lng >= west) & (lng <= east) & (lat >= south) & (lat <= north)
+            lat, lng, values = lat[inside], lng[inside], values[inside]
+        
+        return Response({
+            'bounds': [grid.west, grid.south, grid.east, grid.north],
+            'computed_at': grid.computed_at,
+            'points': np.column_stack([lat, lng, values / grid.max_value]).round(5).tolist(),
+        })
     
     @action(detail=False, methods=['get'])
+    @conditional_cached
+    @limit_concurrency('expensive')
     def statistics(self, request):
         queryset = self.get_queryset()
         stats = {
@@ -96,19 +378,20 @@ class IssueViewSet(viewsets.ModelViewSet):
             'resolved': queryset.filter(status='resolved').count(),
             'by_category': list(
                 queryset.values('category__name')
-                .annotate(count=models.Count('id'))
+                .annotate(count=Count('id'))
                 .order_by('-count')
             )
         }
         return Response(stats)
 
 
-class IssueCommentViewSet(viewsets.ModelViewSet):
+class IssueCommentViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     queryset = IssueComment.objects.select_related('user', 'issue')
     serializer_class = IssueCommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['issue']
+    cursor_pagination_class = CommentCursorPagination
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -0,0 +1,233 @@
+"""
+Async versions of the hottest read-only API views.
+
+DRF views are synchronous, so under ASGI each ``IssueViewSet`` request
+still holds a worker thread while it waits on PostgreSQL or Redis. These
+plain Django views answer the same questions (same payloads, filters,
+privacy rules and response cache) with the async ORM and cache API, so a
+worker keeps serving other requests while one waits.
+
+Django 4.2's async ORM hands every query to the single thread-sensitive
+executor, over one connection, so queries passed to ``asyncio.gather``
+still run one after another; gathering only keeps the code ready for a
+natively async ORM. The gain is in the event loop being free while they
+run. They are served at ``/api/async/...``; the DRF endpoints remain for
+the browsable API and for WSGI deployments.
+"""
+import asyncio
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.http import HttpResponse, HttpResponseNotAllowed
+from locallens.throttling import limit_concurrency
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .caching import aget_generation, conditional_response, copy_validators, validator_response, viewer_class
+from .clustering import cluster_issues
+from .fastpath import ISSUE_ROWS, MAP_ROWS
+from .api_views import IssueViewSet
+from .filters import IssueFilterSet, IssueSearchFilter
+from .models import Issue
+from .renderers import ORJSONRenderer
+from .serializers import IssueMapSerializer, IssueSerializer
+from .spatial import check_zoom, parse_bbox
+
+
+class BadRequest(ValueError):
+    pass
+
+
+async def aget_user(request):
+    # request.user is lazy: it reads the session and the user on first
+    # access, which must not happen on the event loop
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+def _authenticate(request):
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        return drf_request.user
+    except AuthenticationFailed as exc:
+        # Answered as APIView.permission_denied() would: 401 with a
+        # challenge when the first authenticator has one, 403 otherwise
+        response = _json({'detail': exc.detail}, status=exc.status_code)
+        header = drf_request.authenticators[0].authenticate_header(drf_request)
+        if header:
+            response['WWW-Authenticate'] = header
+        else:
+            response.status_code = 403
+        return response
+
+
+async def aget_api_user(request):
+    """
+    The viewer as the DRF views see it, through the same
+    ``DEFAULT_AUTHENTICATION_CLASSES`` (session and HTTP Basic), or the
+    error response for bad credentials.
+    """
+    return await sync_to_async(_authenticate)(request)
+
+
+def _json(data, status=200):
+    return HttpResponse(ORJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def _int_param(params, name, default=None):
+    value = params.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise BadRequest({name: f'{name} must be an integer'})
+
+
+def _visible_issues(user):
+    issues = Issue.objects.filter(is_duplicate=False)
+    if not user.is_authenticated or not user.is_authority:
+        issues = issues.filter(privacy='public')
+    return issues
+
+
+def _requested_fields(serializer_class, params):
+    try:
+        return serializer_class.requested_fields(params)
+    except ValidationError as exc:
+        raise BadRequest(exc.detail)
+
+
+@sync_to_async
+def _filtered(request, issues):
+    # Validating the category and choosing the search fallback both query
+    # the database, so this runs off the event loop
+    filterset = IssueFilterSet(request.GET, queryset=issues)
+    if not filterset.is_valid():
+        raise BadRequest({name: [str(error) for error in errors] for name, errors in filterset.errors.items()})
+    issues = filterset.qs
+    # The same ?ordering= and search-rank ordering as IssueViewSet
+    drf_request, view = Request(request), IssueViewSet()
+    for backend in (OrderingFilter, IssueSearchFilter):
+        issues = backend().filter_queryset(drf_request, issues, view)
+    return issues
+
+
+def async_cached(view):
+    """
+    The async counterpart of ``caching.conditional_cached``: same
+    generation, validators and shared cache, with the viewer passed to the
+    view as ``user``.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        user = await aget_api_user(request)
+        if isinstance(user, HttpResponse):
+            return user
+        generation = await aget_generation()
+        params = sorted((name, value) for name, values in request.GET.lists() for value in values)
+        request_key = ':'.join([request.get_host(), request.path, urlencode(params), 'json', viewer_class(user)])
+        key = hashlib.md5(request_key.encode()).hexdigest()
+
+        response_validators = validator_response(generation, key)
+        conditional = conditional_response(request, response_validators)
+        if conditional is not None:
+            return conditional
+
+        cache_key = f'issues:async:{generation}:{key}'
+        content = await cache.aget(cache_key)
+        if content is not None:
+            response = HttpResponse(content, content_type='application/json')
+        else:
+            try:
+                response = await view(request, user, *args, **kwargs)
+            except BadRequest as exc:
+                return _json(exc.args[0], status=400)
+            if response.status_code == 200:
+                await cache.aset(cache_key, response.content, settings.ISSUE_API_CACHE_TIMEOUT)
+        return copy_validators(response_validators, response)
+    return wrapper
+
+
+@async_cached
+async def issue_detail(request, user, pk):
+    encoder = ISSUE_ROWS.restrict(_requested_fields(IssueSerializer, request.GET))
+    try:
+        row = await encoder.values(_visible_issues(user)).aget(pk=pk)
+    except Issue.DoesNotExist:
+        return _json({'detail': 'Not found.'}, status=404)
+    return _json(encoder.encode([row], request)[0])
+
+
+@async_cached
+async def map_data(request, user):
+    params = request.GET
+    issues = await _filtered(request, _visible_issues(user))
+
+    if params.get('bbox'):
+        try:
+            envelope = Polygon.from_bbox(parse_bbox(params['bbox']))
+        except ValueError as e:
+            raise BadRequest({'bbox': str(e)})
+        envelope.srid = 4326
+        issues = issues.filter(location__bboverlaps=envelope)
+
+    encoder = MAP_ROWS.restrict(_requested_fields(IssueMapSerializer, params))
+    if not {'zoom', 'bbox', 'limit'} & set(params.keys()):
+        rows = encoder.values(issues)
+        return _json(encoder.encode([row async for row in rows], request))
+
+    zoom = _int_param(params, 'zoom')
+    if zoom is not None:
+        try:
+            check_zoom(zoom)
+        except ValueError as e:
+            raise BadRequest({'zoom': str(e)})
+    if zoom is not None and zoom <= settings.ISSUE_CLUSTER_MAX_ZOOM:
+        clusters = await sync_to_async(cluster_issues)(issues, zoom)
+        return _json({'mode': 'clusters', 'zoom': zoom, 'clusters': clusters})
+
+    limit = _int_param(params, 'limit', settings.ISSUE_MAP_DEFAULT_LIMIT)
+    limit = max(1, min(limit, settings.ISSUE_MAP_MAX_LIMIT))
+    rows = encoder.values(issues.order_by('-upvotes', '-created_at', '-id'))[:limit + 1]
+    rows = [row async for row in rows]
+    results = encoder.encode(rows[:limit], request)
+    return _json({
+        'mode': 'points',
+        'zoom': zoom,
+        'count': len(results),
+        'truncated': len(rows) > limit,
+        'results': results,
+    })
+
+
+async def _list(queryset):
+    return [row async for row in queryset]
+
+
+@async_cached
+@limit_concurrency('expensive')
+async def statistics(request, user):
+    issues = _visible_issues(user)
+    # Counts in one pass instead of one COUNT per status; the two queries
+    # run in turn (see the module docstring)
+    counts, by_category = await asyncio.gather(
+        issues.aaggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status='pending')),
+            in_progress=Count('id', filter=Q(status='in_progress')),
+            resolved=Count('id', filter=Q(status='resolved')),
+        ),
+        _list(issues.values('category__name').annotate(count=Count('id')).order_by('-count')),
+    )
+    return _json({**counts, 'by_category': by_category})
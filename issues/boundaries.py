@@ -0,0 +1,94 @@
+"""
+Point-in-polygon assignment of wards and zones.
+
+Boundaries are loaded once per process into an STRtree of prepared shapely
+geometries, so assigning an issue costs a tree lookup rather than a
+database round trip. Edits to boundaries bump a version in the shared
+cache; each process notices within BOUNDARY_INDEX_RECHECK seconds and
+reloads.
+"""
+import threading
+import time
+
+import shapely
+from django.conf import settings
+from django.core.cache import cache
+from shapely import wkb
+from shapely.geometry import Point
+from shapely.strtree import STRtree
+
+VERSION_KEY = 'issues:boundaries:version'
+
+
+class BoundaryIndex:
+    def __init__(self, boundaries):
+        self.trees = {}
+        for kind in ('ward', 'zone'):
+            # Smallest first, so nested or overlapping boundaries resolve
+            # to the most specific one
+            entries = sorted(
+                ((name, wkb.loads(bytes(geometry.wkb))) for k, name, geometry in boundaries if k == kind),
+                key=lambda entry: entry[1].area,
+            )
+            if not entries:
+                continue
+            names = [name for name, _ in entries]
+            geometries = [geometry for _, geometry in entries]
+            shapely.prepare(geometries)
+            self.trees[kind] = (STRtree(geometries), geometries, names)
+
+    @classmethod
+    def load(cls):
+        from .models import Boundary
+        return cls(Boundary.objects.values_list('kind', 'name', 'geometry'))
+
+    def lookup(self, lng, lat):
+        """Return ``{'ward': name, 'zone': name}`` for a point, '' where unknown."""
+        point = Point(lng, lat)
+        result = {'ward': '', 'zone': ''}
+        for kind, (tree, geometries, names) in self.trees.items():
+            # The tree narrows to bounding-box hits, in the original order
+            for i in sorted(tree.query(point)):
+                if geometries[i].contains(point):
+                    result[kind] = names[i]
+                    break
+        return result
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+_checked_at = 0.0
+
+
+def get_index():
+    global _index, _index_version, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < settings.BOUNDARY_INDEX_RECHECK:
+        return _index
+
+    with _lock:
+        version = cache.get(VERSION_KEY, 0)
+        if _index is None or version != _index_version:
+            _index = BoundaryIndex.load()
+            _index_version = version
+        _checked_at = now
+        return _index
+
+
+def invalidate_index():
+    global _index
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+    _index = None
+
+
+def assign_jurisdiction(issue, overwrite=False):
+    """Fill ``issue.ward``/``issue.zone`` from its location, keeping set values unless ``overwrite``."""
+    if not issue.location:
+        return
+    for kind, name in get_index().lookup(issue.location.x, issue.location.y).items():
+        if name and (overwrite or not getattr(issue, kind)):
+            setattr(issue, kind, name)
@@ -0,0 +1,190 @@
+"""
+Conditional GETs and a shared response cache for the issues API.
+
+Every write that can change what the API returns bumps one generation
+counter, which holds the time of the last write in nanoseconds. A response
+is identified by that generation together with the normalized request
+(host, path, query parameters, negotiated format and whether the viewer sees
+private issues). So an ETag can be checked, and a cached body found,
+without touching the database, and one bump makes every earlier copy stale.
+
+Figures scoped to a ward and zone (the authority dashboard) use
+generations of their own, one per jurisdiction, so a write only stales
+the jurisdictions the issue is in.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date
+
+GENERATION_KEY = 'issues:generation'
+JURISDICTIONS_KEY = 'issues:generation:jurisdictions'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # First use, or evicted: any new value invalidates what was cached
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+async def aget_generation():
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, time.time_ns(), None)
+        generation = await cache.aget(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def _jurisdiction_key(ward, zone):
+    digest = hashlib.md5(f'{ward}\0{zone}'.encode()).hexdigest()
+    return f'issues:generation:jurisdiction:{digest}'
+
+
+def _scopes(ward, zone):
+    # Authorities see their ward, their zone, both or everything
+    return {(ward, zone), (ward, ''), ('', zone), ('', '')}
+
+
+def get_jurisdiction_generation(ward, zone):
+    """Generation of the issues an authority with ``ward`` and ``zone`` (either may be blank) sees."""
+    keys = [JURISDICTIONS_KEY, _jurisdiction_key(ward, zone)]
+    generations = cache.get_many(keys)
+    if len(generations) < len(keys):
+        now = time.time_ns()
+        for key in keys:
+            cache.add(key, now, None)
+        generations = cache.get_many(keys)
+    return tuple(generations.get(key) for key in keys)
+
+
+def bump_jurisdictions(pairs):
+    """Bump every jurisdiction that sees an issue in one of the ``(ward, zone)`` pairs."""
+    now = time.time_ns()
+    keys = {_jurisdiction_key(*scope) for ward, zone in pairs for scope in _scopes(ward or '', zone or '')}
+    if keys:
+        cache.set_many({key: now for key in keys}, None)
+
+
+def bump_all_jurisdictions():
+    cache.set(JURISDICTIONS_KEY, time.time_ns(), None)
+
+
+def viewer_class(user):
+    return 'authority' if user.is_authenticated and user.is_authority else 'public'
+
+
+def request_key(request):
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    return ':'.join([
+        request.get_host(),
+        request.path,
+        urlencode(params),
+        request.accepted_renderer.format,
+        viewer_class(request.user),
+    ])
+
+
+def _last_modified(generation):
+    # Only advertised once the second of the last write has passed; a write
+    # later in the same second would otherwise look unmodified to clients
+    # that only send If-Modified-Since
+    last_modified = math.ceil(generation / 1e9)
+    return last_modified if time.time() > last_modified else None
+
+
+def validator_response(generation, key):
+    """An empty response carrying the ETag and Last-Modified for ``key``."""
+    response = HttpResponse()
+    response['ETag'] = f'"{generation:x}-{key}"'
+    last_modified = _last_modified(generation)
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Cookie', 'Authorization'])
+    return response
+
+
+def conditional_response(request, validators):
+    """The 304 or 412 response ``request`` gets, or None to serve it in full."""
+    last_modified = validators.get('Last-Modified')
+    response = get_conditional_response(
+        request,
+        etag=validators['ETag'],
+        last_modified=parse_http_date(last_modified) if last_modified else None,
+        response=validators,
+    )
+    return None if response is validators else response
+
+
+def copy_validators(validators, response):
+    for header in ('ETag', 'Last-Modified'):
+        if header in validators:
+            response[header] = validators[header]
+    patch_vary_headers(response, ['Cookie', 'Authorization'])
+    return response
+
+
+def conditional_cached(view_method):
+    """
+    Serve a ``GET`` action from the generation: 304 when the client's copy
+    is current, the cached body when another client already fetched it,
+    and otherwise run the view and let ``CachedResponseMixin`` store it.
+
+    The browsable API is left alone, since its pages differ per user.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.accepted_renderer.format == 'api':
+            return view_method(self, request, *args, **kwargs)
+
+        generation = get_generation()
+        key = hashlib.md5(request_key(request).encode()).hexdigest()
+        response_validators = validator_response(generation, key)
+        conditional = conditional_response(request._request, response_validators)
+        if conditional is not None:
+            # 304 Not Modified, or 412 for a failed If-Match
+            return conditional
+
+        cache_key = f'issues:api:{generation}:{key}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = view_method(self, request, *args, **kwargs)
+            response.response_cache_key = cache_key
+        return copy_validators(response_validators, response)
+    return wrapper
+
+
+class CachedResponseMixin:
+    """Store successful responses of ``conditional_cached`` actions once rendered."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        cache_key = getattr(response, 'response_cache_key', None)
+        if cache_key and response.status_code == 200:
+            response.render()
+            cache.set(
+                cache_key,
+                (response.content, response['Content-Type']),
+                settings.ISSUE_API_CACHE_TIMEOUT,
+            )
+        return response
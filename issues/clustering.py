@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Floor, Substr
+
+from . import geohash
+from .spatial import X, Y
+
+
+def grid_size_for_zoom(zoom):
+    """Cell size in degrees, so that a map tile holds a fixed number of cells."""
+    return 360.0 / (2 ** zoom) / settings.ISSUE_CLUSTER_CELLS_PER_TILE
+
+
+def cluster_issues(queryset, zoom):
+    """
+    Aggregate ``queryset`` onto a square grid sized for ``zoom``.
+
+    The grouping happens in SQL, so the number of rows returned depends on
+    the number of occupied cells (times statuses and categories), never on
+    the number of issues.
+    """
+    size = grid_size_for_zoom(zoom)
+    rows = (
+        queryset
+        .order_by()
+        .annotate(
+            cell_x=Floor(X('location') / size),
+            cell_y=Floor(Y('location') / size),
+        )
+        .values('cell_x', 'cell_y', 'status', category_name=F('category__name'))
+        .annotate(count=Count('id'), lng_sum=Sum(X('location')), lat_sum=Sum(Y('location')))
+    )
+
+    cells = {}
+    for row in rows:
+        cell = cells.setdefault((row['cell_x'], row['cell_y']), {
+            'count': 0, 'lat_sum': 0.0, 'lng_sum': 0.0, 'statuses': {}, 'categories': {},
+        })
+        cell['count'] += row['count']
+        cell['lat_sum'] += row['lat_sum']
+        cell['lng_sum'] += row['lng_sum']
+        statuses, categories = cell['statuses'], cell['categories']
+        statuses[row['status']] = statuses.get(row['status'], 0) + row['count']
+        categories[row['category_name']] = categories.get(row['category_name'], 0) + row['count']
+
+    return [
+        {
+            'lat': cell['lat_sum'] / cell['count'],
+            'lng': cell['lng_sum'] / cell['count'],
+            'count': cell['count'],
+            'statuses': cell['statuses'],
+            'categories': cell['categories'],
+        }
+        for cell in cells.values()
+    ]
+
+
+def count_by_cell(queryset, precision):
+    """
+    Count ``queryset`` per geohash cell of ``precision`` characters.
+
+    This is a GROUP BY over a prefix of the precomputed ``Issue.geohash``
+    column, so no spatial functions run per row.
+    """
+    rows = (
+        queryset
+        .exclude(geohash='')
+        .order_by()
+        .annotate(cell=Substr('geohash', 1, precision))
+        .values('cell')
+        .annotate(count=Count('id'))
+        .order_by('-count')
+    )
+    cells = []
+    for row in rows:
+        lat, lng = geohash.center(row['cell'])
+        cells.append({'cell': row['cell'], 'lat': lat, 'lng': lng, 'count': row['count']})
+    return cells
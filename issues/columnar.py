@@ -0,0 +1,110 @@
+"""
+Compact columnar encoding of map payloads.
+
+Layout (all integers little-endian)::
+
+    b'LLC1' | uint32 header length | JSON header, space-padded to 4 bytes
+    | column 0 | column 1 | ...
+
+The header lists the columns in order as ``{"name", "type", "length"}``
+with ``type`` one of ``int32``/``uint16``/``uint8``, plus any string tables
+and metadata. Each column is padded to a 4-byte boundary, so a browser can
+view it directly as a typed array over the response ``ArrayBuffer``.
+
+Coordinates are fixed-point (``COORDINATE_SCALE`` units per degree, about
+1 m) and delta-encoded against the previous row; status and category are
+small integer codes into the header's ``statuses``/``categories`` tables.
+"""
+import json
+import struct
+
+import numpy as np
+
+from .spatial import X, Y
+
+MAGIC = b'LLC1'
+COORDINATE_SCALE = 100000
+
+_DTYPES = {'int32': '<i4', 'uint16': '<u2', 'uint8': 'u1'}
+
+
+def _pad(data, fill=b'\0'):
+    return data + fill * (-len(data) % 4)
+
+
+def encode(columns, **meta):
+    """Pack ``{name: (type, values)}`` columns and metadata into bytes."""
+    header = dict(meta, columns=[])
+    body = []
+    for name, (column_type, values) in columns.items():
+        array = np.asarray(values, dtype=_DTYPES[column_type])
+        header['columns'].append({'name': name, 'type': column_type, 'length': len(array)})
+        body.append(_pad(array.tobytes()))
+
+    header = _pad(json.dumps(header, separators=(',', ':'), default=str).encode(), b' ')
+    return MAGIC + struct.pack('<I', len(header)) + header + b''.join(body)
+
+
+def decode(data):
+    """Inverse of ``encode``: return ``(columns, header)``."""
+    if data[:4] != MAGIC:
+        raise ValueError('Not a columnar payload')
+    (header_length,) = struct.unpack_from('<I', data, 4)
+    offset = 8 + header_length
+    header = json.loads(data[8:offset])
+    columns = {}
+    for column in header['columns']:
+        dtype = np.dtype(_DTYPES[column['type']])
+        columns[column['name']] = np.frombuffer(data, dtype=dtype, count=column['length'], offset=offset)
+        offset += column['length'] * dtype.itemsize
+        offset += -offset % 4
+    return columns, header
+
+
+def delta_coordinates(values):
+    fixed = np.round(np.asarray(values, dtype=np.float64) * COORDINATE_SCALE).astype(np.int64)
+    return np.diff(fixed, prepend=0)
+
+
+def undelta_coordinates(deltas):
+    return np.cumsum(deltas, dtype=np.int64) / COORDINATE_SCALE
+
+
+def issue_columns(queryset, statuses, categories, limit=None):
+    """
+    Build point columns for ``queryset``, fetched as plain tuples, and
+    report whether more than ``limit`` rows matched.
+
+    ``statuses`` and ``categories`` are the string tables; category ids
+    are mapped to their position in ``categories``.
+    """
+    rows = (
+        queryset
+        .annotate(lat=Y('location'), lng=X('location'))
+        .values_list('id', 'lat', 'lng', 'status', 'category_id', 'upvotes')
+    )
+    if limit is not None:
+        rows = rows[:limit + 1]
+    rows = list(rows)
+    truncated = limit is not None and len(rows) > limit
+    rows = rows[:limit]
+
+    status_codes = {status: i for i, status in enumerate(statuses)}
+    category_codes = {category_id: i for i, (category_id, _) in enumerate(categories)}
+    ids, lats, lngs, status, category, upvotes = zip(*rows) if rows else ([],) * 6
+    return {
+        'id': ('int32', ids),
+        'lat': ('int32', delta_coordinates(lats)),
+        'lng': ('int32', delta_coordinates(lngs)),
+        'status': ('uint8', [status_codes[value] for value in status]),
+        'category': ('uint16', [category_codes[value] for value in category]),
+        'upvotes': ('int32', upvotes),
+    }, truncated
+
+
+def cluster_columns(clusters):
+    return {
+        'lat': ('int32', delta_coordinates([cluster['lat'] for cluster in clusters])),
+        'lng': ('int32', delta_coordinates([cluster['lng'] for cluster in clusters])),
+        'count': ('int32', [cluster['count'] for cluster in clusters]),
+    }
@@ -0,0 +1,93 @@
+"""
+Issue totals for the home page, kept in ``IssueCounter`` rows.
+
+Every write that adds, removes or re-files an issue adjusts the matching
+counters with ``UPDATE ... SET value = value + n`` in the same
+transaction: ``Issue.save()``/``delete()`` through signals, and the bulk
+paths (imports, status transitions) directly. The home page reads all of
+them with one small query instead of counting issues on every hit.
+``recount`` rewrites them from the issues table, to correct any drift.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Issue, IssueCategory, IssueCounter
+
+TOTAL = 'total'
+
+
+def status_key(status):
+    return f'status:{status}'
+
+
+def category_key(category_id):
+    return f'category:{category_id}'
+
+
+def keys_for(status, category_id):
+    return [TOTAL, status_key(status), category_key(category_id)]
+
+
+def deltas_for(issues, sign=1):
+    """Counter deltas for adding (or, with ``sign=-1``, removing) ``(status, category_id)`` pairs."""
+    deltas = Counter()
+    for status, category_id in issues:
+        for key in keys_for(status, category_id):
+            deltas[key] += sign
+    return deltas
+
+
+def moved(before, after):
+    """Counter deltas for issues re-filed from the ``before`` pairs to the ``after`` pairs."""
+    deltas = deltas_for(after)
+    # subtract(), unlike ``-``, keeps the negative counts
+    deltas.subtract(deltas_for(before))
+    return deltas
+
+
+def adjust(deltas):
+    """Apply ``{key: delta}``; counters not seen before are created."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        # Sorted, so concurrent writers take the row locks in the same order
+        missing = [
+            key for key in sorted(deltas)
+            if not IssueCounter.objects.filter(key=key).update(value=F('value') + deltas[key])
+        ]
+        if missing:
+            IssueCounter.objects.bulk_create([IssueCounter(key=key) for key in missing], ignore_conflicts=True)
+            for key in missing:
+                IssueCounter.objects.filter(key=key).update(value=F('value') + deltas[key])
+
+
+def snapshot():
+    """All counters as ``{key: value}``, in one query."""
+    return dict(IssueCounter.objects.values_list('key', 'value'))
+
+
+def recount():
+    """Rewrite every counter from the issues table; return how many were wrong."""
+    with transaction.atomic():
+        # Writers adjusting a counter wait here until the recount commits,
+        # so an increment is either in the count or applied after it
+        current = dict(IssueCounter.objects.select_for_update().values_list('key', 'value'))
+
+        actual = {TOTAL: Issue.objects.count()}
+        actual.update({status_key(status): 0 for status, _ in Issue.STATUS_CHOICES})
+        actual.update({category_key(pk): 0 for pk in IssueCategory.objects.values_list('pk', flat=True)})
+        for status, count in Issue.objects.order_by().values_list('status').annotate(count=Count('id')):
+            actual[status_key(status)] = count
+        for category_id, count in Issue.objects.order_by().values_list('category').annotate(count=Count('id')):
+            actual[category_key(category_id)] = count
+
+        wrong = {key: value for key, value in actual.items() if current.get(key, 0) != value}
+        IssueCounter.objects.bulk_create(
+            [IssueCounter(key=key, value=value) for key, value in wrong.items()],
+            update_conflicts=True, unique_fields=['key'], update_fields=['value'],
+        )
+        IssueCounter.objects.exclude(key__in=actual).delete()
+    return len(wrong)
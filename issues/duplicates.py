@@ -0,0 +1,82 @@
+import math
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.measure import D
+from django.utils import timezone
+
+from .spatial import X, Y
+
+OPEN_STATUSES = ['pending', 'in_progress']
+
+# Nearest candidates fetched from the database before ranking by text
+CANDIDATE_POOL_SIZE = 50
+
+_WORD_RE = re.compile(r'\w{3,}')
+
+
+def _tokens(text):
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def text_similarity(a, b):
+    """Jaccard similarity of the word sets of two texts, between 0 and 1."""
+    a, b = _tokens(a), _tokens(b)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def find_similar_issues(queryset, location, category, text='', limit=5):
+    """
+    Rank open issues in ``category`` near ``location`` as duplicate candidates.
+
+    The spatial pre-filter is a degree-based ``ST_DWithin`` that the GiST
+    index on ``Issue.location`` answers, refined to an exact radius in
+    metres; only the nearest ``CANDIDATE_POOL_SIZE`` rows are then scored
+    on text similarity, so the cost stays flat as the table grows.
+    """
+    radius = settings.DUPLICATE_SEARCH_RADIUS
+    since = timezone.now() - timedelta(days=settings.DUPLICATE_SEARCH_DAYS)
+
+    # A degree of longitude shrinks towards the poles, so widen for it
+    degrees = radius / (111320.0 * max(math.cos(math.radians(location.y)), 0.01))
+
+    candidates = (
+        queryset
+        .filter(
+            category=category,
+            status__in=OPEN_STATUSES,
+            is_duplicate=False,
+            created_at__gte=since,
+            location__dwithin=(location, degrees),
+            location__distance_lte=(location, D(m=radius)),
+        )
+        .annotate(distance=Distance('location', location), lat=Y('location'), lng=X('location'))
+        .order_by('distance')
+        .values('id', 'title', 'description', 'status', 'upvotes', 'created_at', 'distance', 'lat', 'lng')
+        [:CANDIDATE_POOL_SIZE]
+    )
+
+    results = []
+    for candidate in candidates:
+        distance = candidate['distance'].m
+        similarity = text_similarity(text, f"{candidate['title']} {candidate['description']}") if text else 0.0
+        proximity = 1 - min(distance / radius, 1)
+        results.append({
+            'id': candidate['id'],
+            'title': candidate['title'],
+            'status': candidate['status'],
+            'upvotes': candidate['upvotes'],
+            'created_at': candidate['created_at'],
+            'lat': candidate['lat'],
+            'lng': candidate['lng'],
+            'distance': round(distance, 1),
+            'similarity': round(similarity, 3),
+            'score': round(0.7 * similarity + 0.3 * proximity if text else proximity, 3),
+        })
+
+    results.sort(key=lambda result: result['score'], reverse=True)
+    return results[:limit]
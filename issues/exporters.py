@@ -0,0 +1,118 @@
+"""
+Bulk issue export, the counterpart of ``importers``.
+
+Rows are read with a server-side cursor (``iterator(chunk_size=...)``) as
+plain values, never model instances, and written out as text chunks as
+they arrive, so memory stays flat however many issues are exported. The
+output is meant to be fed to a ``StreamingHttpResponse`` or a file.
+"""
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+FORMATS = ['csv', 'ndjson', 'geojson']
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'geojson': 'application/geo+json',
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Named as importers reads them: category by name, plain latitude/longitude
+COLUMNS = [
+    'id', 'external_id', 'title', 'description', 'category', 'status', 'privacy',
+    'latitude', 'longitude', 'address', 'ward', 'zone',
+    'upvotes', 'comment_count', 'affected_count',
+    'created_at', 'updated_at', 'resolved_at',
+]
+_VALUES = [
+    'id', 'external_id', 'title', 'description', 'category__name', 'status', 'privacy',
+    'location', 'address', 'ward', 'zone',
+    'upvotes', 'comment_count', 'affected_count',
+    'created_at', 'updated_at', 'resolved_at',
+]
+
+
+class ExportFormatError(ValueError):
+    pass
+
+
+def iter_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield each issue of ``queryset`` as a dict keyed by ``COLUMNS``."""
+    for values in queryset.values_list(*_VALUES).iterator(chunk_size=chunk_size):
+        row = dict(zip(_VALUES, values))
+        location = row.pop('location')
+        row['category'] = row.pop('category__name')
+        row['latitude'], row['longitude'] = location.y, location.x
+        yield row
+
+
+def _json(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, COLUMNS)
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow({
+            name: value.isoformat() if hasattr(value, 'isoformat') else value
+            for name, value in row.items()
+        })
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield _json(row) + '\n'
+
+
+def _geojson_lines(rows):
+    yield '{"type": "FeatureCollection", "features": [\n'
+    separator = ''
+    for row in rows:
+        feature = {
+            'type': 'Feature',
+            'id': row['id'],
+            'geometry': {'type': 'Point', 'coordinates': [row['longitude'], row['latitude']]},
+            'properties': {name: value for name, value in row.items() if name not in ('latitude', 'longitude')},
+        }
+        yield separator + _json(feature)
+        separator = ',\n'
+    yield '\n]}\n'
+
+
+WRITERS = {'csv': _csv_lines, 'ndjson': _ndjson_lines, 'geojson': _geojson_lines}
+
+
+def export_issues(queryset, format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Return an iterator of ``queryset`` encoded as ``format``.
+
+    Rows are grouped into strings of up to ``chunk_size`` rows, so neither
+    a response nor a file is written to once per row. An unknown format is
+    raised here rather than once the caller starts reading.
+    """
+    if format not in WRITERS:
+        raise ExportFormatError(f'Unknown format {format!r}; use one of {", ".join(FORMATS)}')
+    return _chunks(WRITERS[format](iter_rows(queryset, chunk_size)), chunk_size)
+
+
+def _chunks(lines, chunk_size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
@@ -0,0 +1,94 @@
+"""
+Sparse fieldsets for issue serializers.
+
+Clients choose the fields they need with ``?fields=a,b``, ``?omit=a,b`` or
+a named ``?preset=``. The same selection narrows the queryset: only the
+columns and joins those fields read are loaded, so a small payload also
+means a small query. Writes always use the full serializer.
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin; ``presets`` maps a preset name to its field names
+    (``None`` for every field) and ``column_sources`` maps fields whose
+    source is not a model field path to the columns they read.
+    """
+    presets = {}
+    column_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if fields is None and request is not None and request.method in SAFE_METHODS:
+            fields = self.requested_fields(request.query_params)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, params):
+        """Field names selected by the query parameters, or None for all of them."""
+        preset, fields, omit = params.get('preset'), params.get('fields'), params.get('omit')
+        if not (preset or fields or omit):
+            return None
+
+        available = list(cls.Meta.fields)
+        if preset:
+            if preset not in cls.presets:
+                raise ValidationError({'preset': f'Unknown preset; use one of {", ".join(cls.presets)}'})
+            selected = cls.presets[preset] or available
+        elif fields:
+            selected = _names(fields)
+        else:
+            selected = available
+        omitted = _names(omit or '')
+
+        unknown = (set(selected) | set(omitted)) - set(available)
+        if unknown:
+            raise ValidationError({'fields': f'Unknown fields: {", ".join(sorted(unknown))}'})
+        return [name for name in available if name in selected and name not in omitted]
+
+    @classmethod
+    def _column_paths(cls, name):
+        if name in cls.column_sources:
+            return cls.column_sources[name]
+        declared = cls._declared_fields.get(name)
+        path = (declared.source if declared is not None and declared.source else name).replace('.', '__')
+        try:
+            cls.Meta.model._meta.get_field(path.split('__')[0])
+        except FieldDoesNotExist:
+            return None
+        return [path]
+
+    @classmethod
+    def restrict_queryset(cls, queryset, fields, extra_columns=()):
+        """
+        Load only what ``fields`` read, plus ``extra_columns``. A field whose
+        columns cannot be told must be listed in ``column_sources``, rather
+        than quietly loading every column.
+        """
+        if fields is None:
+            return queryset
+        columns, relations = set(extra_columns), set()
+        for name in fields:
+            paths = cls._column_paths(name)
+            if paths is None:
+                raise ImproperlyConfigured(
+                    f'{cls.__name__}.{name} reads no model field; add it to column_sources'
+                )
+            for path in paths:
+                columns.add(path)
+                if '__' in path:
+                    relation = path.split('__')[0]
+                    relations.add(relation)
+                    columns.add(relation)
+        return queryset.select_related(None).select_related(*relations).only(*columns)
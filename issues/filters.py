@@ -0,0 +1,33 @@
+import django_filters
+from rest_framework import filters
+from rest_framework.settings import api_settings
+from .models import Issue
+from .search import search_issues
+
+
+class IssueFilterSet(django_filters.FilterSet):
+    # Same date semantics as IssueFilterForm, so the map and the API agree
+    date_from = django_filters.DateFilter(field_name='created_at', lookup_expr='gte')
+    date_to = django_filters.DateFilter(field_name='created_at', lookup_expr='lte')
+    
+    class Meta:
+        model = Issue
+        fields = ['category', 'status', 'ward', 'zone']
+
+
+class IssueSearchFilter(filters.SearchFilter):
+    """
+    Ranked full-text ``?search=`` over title, description and address.
+    
+    Listed after ``OrderingFilter`` so that, unless the client asked for an
+    explicit ``?ordering=``, the best matches come first.
+    """
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        
+        queryset = search_issues(queryset, text)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', '-created_at', '-id')
+        return queryset
@@ -2,11 +2,19 @@ from django import forms
 from django.contrib.gis import forms as gis_forms
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Submit, Row, Column, Field
+from .duplicates import OPEN_STATUSES
 from .models import Issue, IssueComment
 
 class IssueReportForm(forms.ModelForm):
     latitude = forms.FloatField(widget=forms.HiddenInput())
     longitude = forms.FloatField(widget=forms.HiddenInput())
+    # Set when the reporter confirms one of the suggested similar issues;
+    # limited to what find_similar_issues can suggest to the public
+    duplicate_of = forms.ModelChoiceField(
+        queryset=Issue.objects.filter(is_duplicate=False, privacy='public', status__in=OPEN_STATUSES),
+        required=False,
+        widget=forms.HiddenInput()
+    )
     
     class Meta:
         model = Issue
@@ -37,6 +45,7 @@ class IssueReportForm(forms.ModelForm):
             ),
             Field('latitude'),
             Field('longitude'),
+            Field('duplicate_of'),
             Submit('submit', 'Submit Issue', css_class='btn btn-primary mt-3')
         )
     
@@ -47,6 +56,10 @@ class IssueReportForm(forms.ModelForm):
             float(self.cleaned_data['longitude']),
             float(self.cleaned_data['latitude'])
         )
+        if self.cleaned_data.get('duplicate_of'):
+            instance.duplicate_of = self.cleaned_data['duplicate_of']
+            instance.is_duplicate = True
+            instance.status = 'duplicate'
         if commit:
             instance.save()
         return instance
@@ -78,3 +91,28 @@ class IssueFilterForm(forms.Form):
         super().__init__(*args, **kwargs)
         from .models import IssueCategory
         self.fields['category'].queryset = IssueCategory.objects.all()
+    
+    def filter_queryset(self, queryset):
+        if not self.is_valid():
+            return queryset
+        if self.cleaned_data.get('category'):
+            queryset = queryset.filter(category=self.cleaned_data['category'])
+        if self.cleaned_data.get('status'):
+            queryset = queryset.filter(status=self.cleaned_data['status'])
+        if self.cleaned_data.get('date_from'):
+            queryset = queryset.filter(created_at__gte=self.cleaned_data['date_from'])
+        if self.cleaned_data.get('date_to'):
+            queryset = queryset.filter(created_at__lte=self.cleaned_data['date_to'])
+        return queryset
+    
+    def cache_key(self):
+        # Normalized form of the applied filters, e.g. for caching per filter set
+        if not self.is_valid():
+            return ''
+        category = self.cleaned_data.get('category')
+        return ':'.join([
+            str(category.pk) if category else '',
+            self.cleaned_data.get('status') or '',
+            str(self.cleaned_data.get('date_from') or ''),
+            str(self.cleaned_data.get('date_to') or ''),
+        ])
@@ -0,0 +1,65 @@
+"""
+Geohash encoding for Issue locations.
+
+A geohash is a base-32 string where every extra character narrows the
+cell, so "count by cell at resolution N" is a GROUP BY on the first N
+characters and "issues in a cell" is an indexed prefix match.
+"""
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+MAX_PRECISION = 12
+
+
+def encode(lat, lng, precision=MAX_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        target, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (target[0] + target[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            target[0] = mid
+        else:
+            bits <<= 1
+            target[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def bounds(geohash):
+    """Return the (west, south, east, north) bounds of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if (value >> shift) & 1:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+
+    return lng_range[0], lat_range[0], lng_range[1], lat_range[1]
+
+
+def center(geohash):
+    """Return the (lat, lng) centre of a geohash cell."""
+    west, south, east, north = bounds(geohash)
+    return (south + north) / 2, (west + east) / 2
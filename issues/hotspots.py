@@ -0,0 +1,126 @@
+"""
+Density-based (DBSCAN) hotspot detection.
+
+Points are projected to metres and bucketed into a grid of ``eps``-sized
+cells, so neighbours are only searched in the 3x3 block of cells around
+each point. Core points are then joined into clusters with vectorized
+label propagation rather than a per-point Python expansion.
+"""
+import math
+from collections import Counter
+
+import numpy as np
+from django.contrib.gis.geos import MultiPoint, Point
+
+EARTH_RADIUS = 6371000.0
+
+_NEIGHBOUR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def project(lng, lat):
+    """Local equirectangular projection to metres; accurate at ``eps`` scale."""
+    lat_rad = np.radians(lat)
+    return np.column_stack([
+        EARTH_RADIUS * np.radians(lng) * np.cos(lat_rad),
+        EARTH_RADIUS * lat_rad,
+    ])
+
+
+def _neighbour_pairs(xy, eps):
+    """Return arrays ``(i, j)`` of every pair with ``i < j`` within ``eps``."""
+    cells = np.floor(xy / eps).astype(np.int64)
+    order = np.lexsort((cells[:, 1], cells[:, 0]))
+    sorted_cells = cells[order]
+    boundaries = np.flatnonzero(np.any(np.diff(sorted_cells, axis=0) != 0, axis=1)) + 1
+    groups = np.split(order, boundaries)
+    cell_index = {tuple(sorted_cells[start]): group
+                  for start, group in zip(np.r_[0, boundaries], groups)}
+
+    pairs_i, pairs_j = [], []
+    for (cx, cy), members in cell_index.items():
+        candidates = [cell_index.get((cx + dx, cy + dy)) for dx, dy in _NEIGHBOUR_OFFSETS]
+        candidates = np.concatenate([c for c in candidates if c is not None])
+        delta = xy[members][:, None, :] - xy[candidates][None, :, :]
+        mi, cj = np.nonzero((delta ** 2).sum(axis=2) <= eps ** 2)
+        i, j = members[mi], candidates[cj]
+        # Each pair is seen from both cells; keep one copy and drop self-pairs
+        keep = i < j
+        pairs_i.append(i[keep])
+        pairs_j.append(j[keep])
+
+    if not pairs_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def dbscan(xy, eps, min_samples):
+    """Cluster ``xy`` (metres); return a label per point, -1 for noise."""
+    n = len(xy)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    i, j = _neighbour_pairs(xy, eps)
+    neighbours = np.bincount(i, minlength=n) + np.bincount(j, minlength=n) + 1
+    core = neighbours >= min_samples
+
+    # Label propagation over core-core edges: every core point ends up
+    # labelled with the smallest index in its connected component.
+    # ``n`` is a sentinel label for points not (yet) in any cluster.
+    labels = np.where(core, np.arange(n), n)
+    labels = np.append(labels, n)
+    both_core = core[i] & core[j]
+    ci, cj = i[both_core], j[both_core]
+    while True:
+        lowest = np.minimum(labels[ci], labels[cj])
+        updated = labels.copy()
+        np.minimum.at(updated, ci, lowest)
+        np.minimum.at(updated, cj, lowest)
+        updated = updated[updated]  # pointer jumping
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    # Border points join the cluster of a neighbouring core point
+    for src, dst in ((i, j), (j, i)):
+        border = core[src] & ~core[dst]
+        labels[dst[border]] = labels[src[border]]
+
+    labels = labels[:n]
+    clustered = labels < n
+    result = np.full(n, -1, dtype=np.int64)
+    result[clustered] = np.unique(labels[clustered], return_inverse=True)[1]
+    return result
+
+
+def build_hotspots(rows, eps, min_samples):
+    """
+    Find hotspots among ``rows`` of ``(lng, lat, upvotes, ward, zone)``.
+
+    Yields dicts with the hull polygon, centroid, member count, score and
+    the most common ward/zone of the members.
+    """
+    if not rows:
+        return
+    lng, lat, upvotes, wards, zones = zip(*rows)
+    lng = np.asarray(lng, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    upvotes = np.asarray(upvotes, dtype=np.float64)
+    labels = dbscan(project(lng, lat), eps, min_samples)
+
+    # Roughly ``eps`` in degrees, to give degenerate hulls some area
+    pad = eps / 111320.0
+    for label in range(labels.max() + 1):
+        members = np.flatnonzero(labels == label)
+        points = MultiPoint([Point(lng[k], lat[k]) for k in members], srid=4326)
+        hull = points.convex_hull
+        if hull.geom_type != 'Polygon':
+            hull = hull.buffer(pad)
+        yield {
+            'area': hull,
+            'centroid': Point(float(lng[members].mean()), float(lat[members].mean()), srid=4326),
+            'issue_count': len(members),
+            # Larger clusters rank higher; upvotes add weight with diminishing returns
+            'score': float(len(members) + np.log1p(upvotes[members]).sum()),
+            'ward': Counter(wards[k] for k in members).most_common(1)[0][0],
+            'zone': Counter(zones[k] for k in members).most_common(1)[0][0],
+        }
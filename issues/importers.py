@@ -0,0 +1,203 @@
+"""
+Bulk issue import from partner systems.
+
+Files are parsed as a stream - GeoJSON with ijson, CSV and NDJSON a row at
+a time - so memory stays flat however large the file is. Rows are
+validated and written in chunks with ``bulk_create``, which skips the
+per-issue ``save()`` signals; what those signals would have done is done
+once per chunk instead, including a single notification task for the
+whole chunk.
+
+Every row carries an ``external_id``, unique per reporter, so re-running an
+interrupted import skips what was already created.
+"""
+import csv
+import io
+import itertools
+import json
+
+import ijson
+from django.contrib.gis.geos import Point
+from django.db import IntegrityError, transaction
+
+from . import counters
+from .caching import bump_generation, bump_jurisdictions
+from .models import Issue, IssueCategory
+from .serializers import IssueImportSerializer
+from .tasks import send_new_issues_notification
+from .tiles import invalidate_tiles
+
+FORMATS = ['geojson', 'csv', 'ndjson']
+EXTENSIONS = {
+    '.geojson': 'geojson',
+    '.json': 'geojson',
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+DEFAULT_BATCH_SIZE = 500
+
+# Per-row errors beyond this many are counted but not listed
+MAX_REPORTED_ERRORS = 1000
+
+_ALIASES = {'lat': 'latitude', 'lng': 'longitude', 'lon': 'longitude', 'id': 'external_id'}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    for extension, format in EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return format
+    raise ImportFormatError(f'Cannot tell the format of {filename}; use one of {", ".join(FORMATS)}')
+
+
+def _normalize(row):
+    return {_ALIASES.get(key, key): value for key, value in row.items()}
+
+
+def _from_feature(feature):
+    row = _normalize(feature.get('properties') or {})
+    row.setdefault('external_id', feature.get('id'))
+    geometry = feature.get('geometry') or {}
+    if geometry.get('type') == 'Point':
+        row['longitude'], row['latitude'] = geometry['coordinates'][:2]
+    return row
+
+
+def iter_geojson(stream):
+    number = 0
+    try:
+        for number, feature in enumerate(ijson.items(stream, 'features.item'), 1):
+            yield number, _from_feature(feature)
+    except ijson.JSONError as exc:
+        raise ImportFormatError(f'Invalid GeoJSON after feature {number}: {exc}')
+
+
+def iter_csv(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    # Row 1 is the header
+    for number, row in enumerate(csv.DictReader(text), 2):
+        yield number, _normalize(row)
+
+
+def iter_ndjson(stream):
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, ImportFormatError('Invalid JSON')
+            continue
+        if row.get('type') == 'Feature':
+            yield number, _from_feature(row)
+        else:
+            yield number, _normalize(row)
+
+
+PARSERS = {'geojson': iter_geojson, 'csv': iter_csv, 'ndjson': iter_ndjson}
+
+
+def parse(stream, format):
+    """Yield ``(row number, row)`` from a binary stream; bad rows are exceptions."""
+    if format not in PARSERS:
+        raise ImportFormatError(f'Unknown format {format!r}; use one of {", ".join(FORMATS)}')
+    return PARSERS[format](stream)
+
+
+def _category_lookup():
+    lookup = {}
+    for category_id, name, slug in IssueCategory.objects.values_list('id', 'name', 'slug'):
+        lookup[str(category_id)] = lookup[name.lower()] = lookup[slug.lower()] = category_id
+    return lookup
+
+
+def _import_chunk(chunk, reporter, context):
+    errors = []
+    valid = []
+    for number, row in chunk:
+        if isinstance(row, Exception):
+            errors.append({'row': number, 'errors': {'non_field_errors': [str(row)]}})
+            continue
+        serializer = IssueImportSerializer(data=row, context=context)
+        if serializer.is_valid():
+            valid.append(serializer.validated_data)
+        else:
+            errors.append({'row': number, 'external_id': row.get('external_id'), 'errors': serializer.errors})
+
+    existing = set(
+        Issue.objects.filter(reporter=reporter, external_id__in=[data['external_id'] for data in valid])
+        .values_list('external_id', flat=True)
+    )
+    issues = []
+    for data in valid:
+        if data['external_id'] in existing:
+            continue
+        existing.add(data['external_id'])
+        issue = Issue(
+            reporter=reporter,
+            external_id=data['external_id'],
+            title=data['title'],
+            description=data['description'],
+            category_id=data['category'],
+            location=Point(data['longitude'], data['latitude'], srid=4326),
+            address=data['address'],
+            ward=data.get('ward', ''),
+            zone=data.get('zone', ''),
+            privacy=data['privacy'],
+        )
+        issue.fill_derived_fields()
+        issues.append(issue)
+
+    while issues:
+        try:
+            with transaction.atomic():
+                Issue.objects.bulk_create(issues)
+                counters.adjust(counters.deltas_for([(issue.status, issue.category_id) for issue in issues]))
+            break
+        except IntegrityError:
+            # A concurrent import of the same rows got some of them in first
+            taken = set(
+                Issue.objects.filter(reporter=reporter, external_id__in=[issue.external_id for issue in issues])
+                .values_list('external_id', flat=True)
+            )
+            if not taken:
+                raise
+            issues = [issue for issue in issues if issue.external_id not in taken]
+
+    if issues:
+        send_new_issues_notification.delay([issue.pk for issue in issues])
+        invalidate_tiles([issue.location for issue in issues])
+        bump_generation()
+        bump_jurisdictions({(issue.ward, issue.zone) for issue in issues})
+    return len(issues), len(valid) - len(issues), errors
+
+
+def import_issues(rows, reporter, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Create issues reported by ``reporter`` from ``(row number, row)`` pairs.
+
+    Returns a summary of created and skipped (already imported) rows and the
+    rows that failed validation. A file that cannot be parsed any further
+    stops the import; the chunks before it stay imported.
+    """
+    context = {'categories': _category_lookup()}
+    summary = {'created': 0, 'skipped': 0, 'error_count': 0, 'errors': []}
+    rows = iter(rows)
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, batch_size))
+            if not chunk:
+                break
+            created, skipped, errors = _import_chunk(chunk, reporter, context)
+            summary['created'] += created
+            summary['skipped'] += skipped
+            summary['error_count'] += len(errors)
+            summary['errors'].extend(errors[:MAX_REPORTED_ERRORS - len(summary['errors'])])
+    except ImportFormatError as exc:
+        summary['aborted'] = str(exc)
+    return summary
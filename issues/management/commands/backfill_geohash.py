@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from issues import geohash
+from issues.models import Issue
+
+class Command(BaseCommand):
+    help = 'Compute the geohash cell key for issues that do not have one yet'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Issues updated per query')
+        parser.add_argument('--all', action='store_true', help='Recompute every issue, not only missing ones')
+    
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        issues = Issue.objects.only('id', 'location', 'geohash').order_by('id')
+        if not kwargs['all']:
+            issues = issues.filter(geohash='')
+        
+        updated = 0
+        last_id = 0
+        while True:
+            # Walk by primary key so every batch is an index range scan
+            batch = list(issues.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            
+            for issue in batch:
+                issue.geohash = geohash.encode(issue.location.y, issue.location.x)
+            Issue.objects.bulk_update(batch, ['geohash'])
+            
+            updated += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f'Updated {updated} issues')
+        
+        self.stdout.write(self.style.SUCCESS(f'Successfully backfilled geohash for {updated} issues'))
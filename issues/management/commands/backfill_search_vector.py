@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from issues.models import Issue
+from issues.search import SEARCH_VECTOR
+
+class Command(BaseCommand):
+    help = 'Build the full-text search document for issues that do not have one yet'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Issues updated per query')
+        parser.add_argument('--all', action='store_true', help='Rebuild every issue, not only missing ones')
+    
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        issues = Issue.objects.order_by('id')
+        if not kwargs['all']:
+            issues = issues.filter(search_vector__isnull=True)
+        
+        updated = 0
+        last_id = 0
+        while True:
+            # Short transactions over primary key ranges, so the table stays
+            # writable while the backfill runs
+            ids = list(issues.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            
+            updated += Issue.objects.filter(id__in=ids).update(search_vector=SEARCH_VECTOR)
+            last_id = ids[-1]
+            self.stdout.write(f'Updated {updated} issues')
+        
+        self.stdout.write(self.style.SUCCESS(f'Successfully built search documents for {updated} issues'))
@@ -0,0 +1,71 @@
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Statistics are throttled and concurrency-limited as an expensive call, so
+# under load they mostly measure 429s and 503s; pass them with --path after
+# raising THROTTLE_EXPENSIVE_RATE, THROTTLE_EXPENSIVE_IP_RATE and
+# CONCURRENCY_LIMIT_EXPENSIVE
+DEFAULT_PATHS = [
+    '/api/issues/map_data/?zoom=10&bbox=77.5,12.9,77.7,13.0',
+    '/api/async/issues/map_data/?zoom=10&bbox=77.5,12.9,77.7,13.0',
+    '/api/issues/map_data/?zoom=16&bbox=77.5,12.9,77.7,13.0',
+    '/api/async/issues/map_data/?zoom=16&bbox=77.5,12.9,77.7,13.0',
+]
+
+class Command(BaseCommand):
+    help = (
+        'Load a running server with concurrent requests and report throughput and latency, '
+        'to compare a single WSGI worker with a single ASGI worker'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help='Server to load, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--path', action='append', dest='paths', help='Path to request; repeatable')
+        parser.add_argument('--concurrency', default='1,10,50', help='Comma-separated numbers of clients in flight')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per path and concurrency level')
+        parser.add_argument('--header', action='append', default=[], help="Extra header such as 'Cookie: sessionid=...'")
+        parser.add_argument('--bust-cache', action='store_true',
+                            help='Add a unique query parameter so no request is served from the response cache')
+    
+    def handle(self, *args, **kwargs):
+        try:
+            levels = [int(level) for level in kwargs['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be a list of integers')
+        headers = dict(header.split(':', 1) for header in kwargs['header'])
+        headers = {name.strip(): value.strip() for name, value in headers.items()}
+        
+        self.stdout.write(f"{'path':<60} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6}")
+        for path in kwargs['paths'] or DEFAULT_PATHS:
+            for level in levels:
+                rate, latencies, errors = self._load(
+                    kwargs['base_url'].rstrip('/') + path, level, kwargs['requests'], headers, kwargs['bust_cache']
+                )
+                p50 = statistics.median(latencies) * 1e3 if latencies else 0
+                p95 = statistics.quantiles(latencies, n=20)[-1] * 1e3 if len(latencies) > 1 else p50
+                self.stdout.write(f'{path[:60]:<60} {level:>7} {rate:>8.1f} {p50:>8.1f} {p95:>8.1f} {errors:>6}')
+    
+    def _load(self, url, concurrency, count, headers, bust_cache):
+        def fetch(number):
+            target = url
+            if bust_cache:
+                target += f"{'&' if '?' in url else '?'}_bench={time.time_ns()}-{number}"
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(target, headers=headers), timeout=60) as response:
+                    response.read()
+            except (HTTPError, URLError, OSError):
+                return None
+            return time.perf_counter() - start
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(fetch, range(count)))
+        elapsed = time.perf_counter() - start
+        latencies = [result for result in results if result is not None]
+        return len(latencies) / elapsed, latencies, len(results) - len(latencies)
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from issues.fastpath import MAP_ROWS
+from issues.models import Issue
+from issues.renderers import ORJSONRenderer
+from issues.serializers import IssueMapSerializer
+
+class Command(BaseCommand):
+    help = 'Compare the per-row cost of map_data through IssueMapSerializer and through the fast path'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Issues per run, as map_data would return')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs of each path; the fastest is reported')
+    
+    def handle(self, *args, **kwargs):
+        issues = Issue.objects.filter(is_duplicate=False, privacy='public').order_by('-upvotes', '-created_at', '-id')
+        issues = issues[:kwargs['rows']]
+        count = issues.count()
+        if not count:
+            raise CommandError('No issues to serialize; load some first, e.g. with generate_test_data')
+        request = Request(APIRequestFactory().get('/api/issues/map_data/'))
+        
+        def serializer_path(rows=None):
+            rows = list(issues) if rows is None else rows
+            data = IssueMapSerializer(rows, many=True, context={'request': request}).data
+            return JSONRenderer().render(data)
+        
+        def fast_path(rows=None):
+            rows = list(MAP_ROWS.values(issues)) if rows is None else rows
+            return ORJSONRenderer().render(MAP_ROWS.encode(rows, request))
+        
+        instances = list(issues)
+        rows = list(MAP_ROWS.values(issues))
+        expected = IssueMapSerializer(instances, many=True, context={'request': request}).data
+        if MAP_ROWS.encode(rows, request) != expected:
+            raise CommandError('The fast path does not match IssueMapSerializer')
+        
+        runs = [
+            ('Serializer, query + encode', serializer_path, None),
+            ('Fast path, query + encode', fast_path, None),
+            ('Serializer, encode only', serializer_path, instances),
+            ('Fast path, encode only', fast_path, rows),
+        ]
+        self.stdout.write(f'{count} issues, best of {kwargs["repeat"]} runs')
+        for label, run, prefetched in runs:
+            best = min(self._time(run, prefetched) for _ in range(kwargs['repeat']))
+            self.stdout.write(f'{label:<28} {best * 1e6 / count:8.1f} µs/row  {best * 1e3:8.1f} ms')
+        
+        self.stdout.write(self.style.SUCCESS('Done'))
+    
+    def _time(self, run, prefetched):
+        start = time.perf_counter()
+        run(prefetched)
+        return time.perf_counter() - start
@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from issues.exporters import DEFAULT_CHUNK_SIZE, FORMATS, export_issues
+from issues.filters import IssueFilterSet
+from issues.models import Issue
+
+class Command(BaseCommand):
+    help = 'Export issues to a CSV, NDJSON or GeoJSON file, streaming rows from the database'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to write, or '-' for standard output")
+        parser.add_argument('--format', choices=FORMATS, help='File format, by default taken from the extension')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows fetched per round trip')
+        parser.add_argument('--include-private', action='store_true', help='Also export authorities-only issues')
+        for name in ['category', 'status', 'ward', 'zone', 'date_from', 'date_to']:
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name, help=f'Same as the API ?{name}= filter')
+    
+    def handle(self, *args, **kwargs):
+        file_format = kwargs['format'] or kwargs['path'].rsplit('.', 1)[-1].lower()
+        if file_format not in FORMATS:
+            raise CommandError(f"Cannot tell the format of {kwargs['path']}; use --format")
+        
+        issues = Issue.objects.filter(is_duplicate=False)
+        if not kwargs['include_private']:
+            issues = issues.filter(privacy='public')
+        filters = {name: kwargs[name] for name in IssueFilterSet.base_filters if kwargs.get(name)}
+        filterset = IssueFilterSet(filters, queryset=issues)
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+        issues = filterset.qs.order_by('id')
+        
+        output = sys.stdout if kwargs['path'] == '-' else open(kwargs['path'], 'w', newline='', encoding='utf-8')
+        try:
+            for chunk in export_issues(issues, file_format, kwargs['chunk_size']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        
+        if output is not sys.stdout:
+            self.stdout.write(self.style.SUCCESS(f"Exported issues to {kwargs['path']}"))
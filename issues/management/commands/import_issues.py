@@ -0,0 +1,43 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from issues.importers import DEFAULT_BATCH_SIZE, FORMATS, ImportFormatError, detect_format, import_issues, parse
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Import issues from a GeoJSON, CSV or NDJSON file; re-running skips rows already imported'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--reporter', required=True, help='Username the issues are reported by')
+        parser.add_argument('--format', choices=FORMATS, help='File format, by default taken from the extension')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Issues created per query')
+        parser.add_argument('--errors', help='Write per-row errors to this JSON file')
+    
+    def handle(self, *args, **kwargs):
+        try:
+            reporter = User.objects.get(username=kwargs['reporter'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {kwargs['reporter']}")
+        
+        try:
+            file_format = kwargs['format'] or detect_format(kwargs['path'])
+            with open(kwargs['path'], 'rb') as stream:
+                summary = import_issues(parse(stream, file_format), reporter, kwargs['batch_size'])
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+        
+        if kwargs['errors']:
+            with open(kwargs['errors'], 'w') as output:
+                json.dump(summary['errors'], output, indent=2)
+        for error in summary['errors'][:20]:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        if 'aborted' in summary:
+            self.stderr.write(self.style.ERROR(f"Stopped early: {summary['aborted']}"))
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} issues, skipped {summary['skipped']} already imported, "
+            f"{summary['error_count']} rows with errors"
+        ))
@@ -0,0 +1,44 @@
+from django.contrib.gis.gdal import DataSource
+from django.contrib.gis.geos import MultiPolygon
+from django.core.management.base import BaseCommand, CommandError
+from issues.models import Boundary
+
+class Command(BaseCommand):
+    help = 'Load ward or zone boundary polygons from a GeoJSON file or shapefile'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Any vector file GDAL can read, e.g. .geojson or .shp')
+        parser.add_argument('--kind', choices=['ward', 'zone'], required=True)
+        parser.add_argument('--name-field', default='name', help='Feature attribute holding the boundary name')
+        parser.add_argument('--replace', action='store_true', help='Delete existing boundaries of this kind first')
+    
+    def handle(self, *args, **kwargs):
+        kind = kwargs['kind']
+        layer = DataSource(kwargs['path'])[0]
+        if kwargs['name_field'] not in layer.fields:
+            raise CommandError(
+                f"Field '{kwargs['name_field']}' not found; available: {', '.join(layer.fields)}"
+            )
+        
+        if kwargs['replace']:
+            Boundary.objects.filter(kind=kind).delete()
+        
+        loaded = 0
+        for feature in layer:
+            name = str(feature.get(kwargs['name_field'])).strip()
+            geometry = feature.geom
+            if layer.srs is not None:
+                geometry.transform(4326)
+            geometry = geometry.geos
+            
+            if geometry.geom_type == 'Polygon':
+                geometry = MultiPolygon(geometry)
+            elif geometry.geom_type != 'MultiPolygon':
+                self.stdout.write(self.style.WARNING(f'Skipping {name}: {geometry.geom_type} is not a polygon'))
+                continue
+            geometry.srid = 4326
+            
+            Boundary.objects.update_or_create(kind=kind, name=name, defaults={'geometry': geometry})
+            loaded += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Successfully loaded {loaded} {kind} boundaries'))
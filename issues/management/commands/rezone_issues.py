@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from issues.boundaries import assign_jurisdiction
+from issues.caching import bump_all_jurisdictions, bump_generation
+from issues.models import Issue
+
+class Command(BaseCommand):
+    help = 'Assign ward and zone to existing issues from the loaded boundaries'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Issues processed per batch')
+        parser.add_argument('--overwrite', action='store_true', help='Replace wards/zones that are already set')
+    
+    def handle(self, *args, **kwargs):
+        chunk_size = kwargs['chunk_size']
+        overwrite = kwargs['overwrite']
+        issues = Issue.objects.only('id', 'location', 'ward', 'zone').order_by('id')
+        if not overwrite:
+            issues = issues.filter(Q(ward='') | Q(zone=''))
+        
+        processed = 0
+        changed = 0
+        last_id = 0
+        while True:
+            batch = list(issues.filter(id__gt=last_id)[:chunk_size])
+            if not batch:
+                break
+            
+            updated = []
+            for issue in batch:
+                before = (issue.ward, issue.zone)
+                assign_jurisdiction(issue, overwrite=overwrite)
+                if (issue.ward, issue.zone) != before:
+                    updated.append(issue)
+            
+            # bulk_update skips save() and its signals, which re-zoning does not need
+            Issue.objects.bulk_update(updated, ['ward', 'zone'])
+            
+            processed += len(batch)
+            changed += len(updated)
+            last_id = batch[-1].id
+            self.stdout.write(f'Processed {processed} issues, {changed} re-zoned')
+        
+        if changed:
+            bump_generation()
+            bump_all_jurisdictions()
+        self.stdout.write(self.style.SUCCESS(f'Successfully re-zoned {changed} of {processed} issues'))
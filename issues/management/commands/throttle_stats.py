@@ -0,0 +1,18 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from locallens.throttling import SHED_KEY, shed_counts
+
+class Command(BaseCommand):
+    help = 'Show how many requests were throttled (429) or shed as the server was busy (503)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after showing them')
+    
+    def handle(self, *args, **kwargs):
+        counts = shed_counts()
+        for (reason, scope), count in sorted(counts.items()):
+            self.stdout.write(f'{reason:<10} {scope:<10} {count}')
+        
+        if kwargs['reset']:
+            cache.delete_many([SHED_KEY.format(reason=reason, scope=scope) for reason, scope in counts])
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['geohash'], name='issues_issue_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
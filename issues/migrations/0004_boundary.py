@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:05
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0003_issue_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Boundary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('ward', 'Ward'), ('zone', 'Zone')], max_length=10)),
+                ('geometry', django.contrib.gis.db.models.fields.MultiPolygonField(srid=4326)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['kind', 'name'],
+                'unique_together': {('kind', 'name')},
+            },
+        ),
+    ]
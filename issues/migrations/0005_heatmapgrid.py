@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0004_boundary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeatmapGrid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.CharField(max_length=20)),
+                ('weighting', models.CharField(choices=[('count', 'Issue Count'), ('upvotes', 'Upvotes'), ('affected', 'Affected Users')], max_length=20)),
+                ('west', models.FloatField()),
+                ('south', models.FloatField()),
+                ('east', models.FloatField()),
+                ('north', models.FloatField()),
+                ('rows', models.IntegerField()),
+                ('cols', models.IntegerField()),
+                ('max_value', models.FloatField()),
+                ('cells', models.BinaryField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='issues.issuecategory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'weighting', 'category'], name='issues_heat_band_6a1f0e_idx')],
+            },
+        ),
+    ]
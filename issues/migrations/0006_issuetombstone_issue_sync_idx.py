@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0005_heatmapgrid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('issue_id', models.BigIntegerField()),
+                ('reason', models.CharField(choices=[('deleted', 'Deleted'), ('private', 'Made Private'), ('duplicate', 'Marked Duplicate')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['updated_at', 'id'], name='issues_issue_sync_idx'),
+        ),
+    ]
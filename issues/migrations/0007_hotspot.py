@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:14
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0006_issuetombstone_issue_sync_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hotspot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', django.contrib.gis.db.models.fields.PolygonField(srid=4326)),
+                ('centroid', django.contrib.gis.db.models.fields.PointField(srid=4326)),
+                ('issue_count', models.IntegerField()),
+                ('score', models.FloatField()),
+                ('ward', models.CharField(blank=True, max_length=100)),
+                ('zone', models.CharField(blank=True, max_length=100)),
+                ('computed_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hotspots', to='issues.issuecategory')),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0007_hotspot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('is_duplicate', False), ('privacy', 'public')), fields=['-created_at', '-id'], name='issues_issue_public_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('is_duplicate', False), ('privacy', 'public')), fields=['-upvotes', '-created_at', '-id'], name='issues_issue_public_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('is_duplicate', False)), fields=['-created_at', '-id'], name='issues_issue_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('is_duplicate', False)), fields=['-upvotes', '-created_at', '-id'], name='issues_issue_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuecomment',
+            index=models.Index(fields=['issue', 'created_at', 'id'], name='issues_comment_feed_idx'),
+        ),
+    ]
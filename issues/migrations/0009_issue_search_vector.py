@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Must match issues.search.SEARCH_VECTOR
+SEARCH_TRIGGER_SQL = """
+CREATE FUNCTION issues_issue_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', COALESCE(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(NEW.address, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER issues_issue_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, address ON issues_issue
+    FOR EACH ROW EXECUTE FUNCTION issues_issue_search_vector_update();
+"""
+
+DROP_SEARCH_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS issues_issue_search_vector_trigger ON issues_issue;
+DROP FUNCTION IF EXISTS issues_issue_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0008_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='issue',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='issues_issue_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='issues_issue_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGER_SQL, DROP_SEARCH_TRIGGER_SQL),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_engagement(apps, schema_editor):
+    Issue = apps.get_model('issues', 'Issue')
+    IssueComment = apps.get_model('issues', 'IssueComment')
+    AffectedUser = apps.get_model('issues', 'AffectedUser')
+
+    def counts(model):
+        return Subquery(
+            model.objects.filter(issue=OuterRef('pk')).order_by()
+            .values('issue').annotate(count=Count('id')).values('count')
+        )
+
+    # One set-based UPDATE rather than a query per issue
+    Issue.objects.update(
+        comment_count=Coalesce(counts(IssueComment), Value(0)),
+        affected_count=Coalesce(counts(AffectedUser), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0009_issue_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='comment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='affected_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_engagement, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0010_issue_engagement_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='issue',
+            constraint=models.UniqueConstraint(fields=('reporter', 'external_id'), name='issues_issue_external_id_uniq'),
+        ),
+    ]
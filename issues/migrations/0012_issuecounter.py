@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_issues(apps, schema_editor):
+    Issue = apps.get_model('issues', 'Issue')
+    IssueCategory = apps.get_model('issues', 'IssueCategory')
+    IssueCounter = apps.get_model('issues', 'IssueCounter')
+
+    values = {'total': Issue.objects.count()}
+    values.update({f'category:{pk}': 0 for pk in IssueCategory.objects.values_list('pk', flat=True)})
+    for status, count in Issue.objects.order_by().values_list('status').annotate(count=Count('id')):
+        values[f'status:{status}'] = count
+    for category_id, count in Issue.objects.order_by().values_list('category').annotate(count=Count('id')):
+        values[f'category:{category_id}'] = count
+    IssueCounter.objects.bulk_create([IssueCounter(key=key, value=value) for key, value in values.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0011_issue_external_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('value', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_issues, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
 from django.contrib.gis.db import models as gis_models
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Q
 from django.conf import settings
 from django.utils.text import slugify
+from . import geohash
+from .boundaries import assign_jurisdiction
 
 class IssueCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -22,6 +27,25 @@ class IssueCategory(models.Model):
         super().save(*args, **kwargs)
 
 
+class Boundary(models.Model):
+    KIND_CHOICES = [
+        ('ward', 'Ward'),
+        ('zone', 'Zone'),
+    ]
+    
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    geometry = gis_models.MultiPolygonField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['kind', 'name']
+        ordering = ['kind', 'name']
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.name}"
+
+
 class Issue(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -40,12 +64,18 @@ class Issue(models.Model):
     description = models.TextField()
     category = models.ForeignKey(IssueCategory, on_delete=models.PROTECT, related_name='issues')
     reporter = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reported_issues')
+    # Identifier in the partner system an issue was imported from, unique per reporter
+    external_id = models.CharField(max_length=100, null=True, blank=True)
     
     # Location data
     location = gis_models.PointField()
     address = models.CharField(max_length=500)
     ward = models.CharField(max_length=100, blank=True)
     zone = models.CharField(max_length=100, blank=True)
+    # Full-precision geohash; any prefix of it is the cell at a coarser resolution
+    geohash = models.CharField(max_length=geohash.MAX_PRECISION, blank=True, editable=False)
+    # Weighted title/description/address document, kept current by a trigger
+    search_vector = SearchVectorField(null=True, editable=False)
     
     # Media
     image = models.ImageField(upload_to='issue_images/%Y/%m/%d/')
@@ -56,6 +86,9 @@ class Issue(models.Model):
     
     # Engagement metrics
     upvotes = models.IntegerField(default=0)
+    # Kept in step by signals on IssueComment/AffectedUser, repaired nightly
+    comment_count = models.IntegerField(default=0, editable=False)
+    affected_count = models.IntegerField(default=0, editable=False)
     
     # Duplicate handling
     is_duplicate = models.BooleanField(default=False)
@@ -72,11 +105,63 @@ class Issue(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['status']),
             models.Index(fields=['category']),
+            models.Index(fields=['geohash'], name='issues_issue_geohash_idx',
+                         opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['updated_at', 'id'], name='issues_issue_sync_idx'),
+            # Keyset pagination keys; the partial indexes cover the public
+            # feed, the others what authorities see (duplicates excluded)
+            models.Index(fields=['-created_at', '-id'], name='issues_issue_public_feed_idx',
+                         condition=Q(privacy='public', is_duplicate=False)),
+            models.Index(fields=['-upvotes', '-created_at', '-id'], name='issues_issue_public_top_idx',
+                         condition=Q(privacy='public', is_duplicate=False)),
+            models.Index(fields=['-created_at', '-id'], name='issues_issue_feed_idx',
+                         condition=Q(is_duplicate=False)),
+            models.Index(fields=['-upvotes', '-created_at', '-id'], name='issues_issue_top_idx',
+                         condition=Q(is_duplicate=False)),
+            GinIndex(fields=['search_vector'], name='issues_issue_search_idx'),
+            GinIndex(fields=['title'], name='issues_issue_title_trgm_idx',
+                     opclasses=['gin_trgm_ops']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['reporter', 'external_id'], name='issues_issue_external_id_uniq'),
         ]
     
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
     
+    # Only ever changed with UPDATE ... SET n = n + delta
+    COUNTER_FIELDS = ('upvotes', 'comment_count', 'affected_count')
+    
+    def save(self, *args, **kwargs):
+        self.fill_derived_fields()
+        if not self._state.adding and not args and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            # Writing back the counts loaded earlier would undo increments
+            # made since; deferred fields are left alone, as Django does
+            skipped = set(self.COUNTER_FIELDS) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped and field.name not in skipped
+            ]
+        # Counters kept by post_save handlers commit or roll back with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def fill_derived_fields(self):
+        # Also called directly by code paths that bypass save(), e.g. bulk_create
+        if self.location:
+            self.geohash = geohash.encode(self.location.y, self.location.x)
+            if not (self.ward and self.zone):
+                assign_jurisdiction(self)
+    
+    @property
+    def latitude(self):
+        return self.location.y
+    
+    @property
+    def longitude(self):
+        return self.location.x
+    
     @property
     def resolution_time(self):
         if self.resolved_at:
@@ -84,6 +169,22 @@ class Issue(models.Model):
         return None
 
 
+class IssueTombstone(models.Model):
+    # Records issues that left a client's view, for incremental sync
+    REASON_CHOICES = [
+        ('deleted', 'Deleted'),
+        ('private', 'Made Private'),
+        ('duplicate', 'Marked Duplicate'),
+    ]
+    
+    issue_id = models.BigIntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"Issue {self.issue_id} {self.get_reason_display().lower()}"
+
+
 class IssueUpvote(models.Model):
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='upvote_records')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -105,6 +206,9 @@ class IssueComment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['issue', 'created_at', 'id'], name='issues_comment_feed_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user.username} on {self.issue.title}"
@@ -135,3 +239,66 @@ class AffectedUser(models.Model):
     
     def __str__(self):
         return f"{self.user.username} affected by {self.issue.title}"
+
+
+
+class HeatmapGrid(models.Model):
+    WEIGHTING_CHOICES = [
+        ('count', 'Issue Count'),
+        ('upvotes', 'Upvotes'),
+        ('affected', 'Affected Users'),
+    ]
+    
+    band = models.CharField(max_length=20)
+    category = models.ForeignKey(IssueCategory, on_delete=models.CASCADE, null=True, blank=True)
+    weighting = models.CharField(max_length=20, choices=WEIGHTING_CHOICES)
+    
+    # Grid geometry: rows x cols square cells covering the extent
+    west = models.FloatField()
+    south = models.FloatField()
+    east = models.FloatField()
+    north = models.FloatField()
+    rows = models.IntegerField()
+    cols = models.IntegerField()
+    
+    # Non-empty cells, packed by issues.heatmap.pack_cells
+    max_value = models.FloatField()
+    cells = models.BinaryField()
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'weighting', 'category']),
+        ]
+    
+    def __str__(self):
+        return f"{self.band} heatmap ({self.weighting}) - {self.category or 'All'}"
+
+
+
+class Hotspot(models.Model):
+    # Dense clusters of recent open issues, rebuilt by issues.tasks.detect_hotspots
+    category = models.ForeignKey(IssueCategory, on_delete=models.CASCADE, related_name='hotspots')
+    area = gis_models.PolygonField()
+    centroid = gis_models.PointField()
+    issue_count = models.IntegerField()
+    score = models.FloatField()
+    ward = models.CharField(max_length=100, blank=True)
+    zone = models.CharField(max_length=100, blank=True)
+    computed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-score']
+    
+    def __str__(self):
+        return f"{self.category.name} hotspot ({self.issue_count} issues)"
+
+
+class IssueCounter(models.Model):
+    # Running issue totals for the home page, kept current by issues.counters
+    # ('total', 'status:<status>', 'category:<id>')
+    key = models.CharField(max_length=50, unique=True)
+    value = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.key} = {self.value}"
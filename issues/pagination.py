@@ -0,0 +1,217 @@
+"""
+Keyset ("cursor") pagination for the issue and comment feeds.
+
+DRF's ``PageNumberPagination`` counts the whole filtered queryset and skips
+rows with OFFSET, so every page costs more than the one before it. Here a
+page is located by the sort key of the row it continues from, using a
+tuple comparison on the complete ordering (always ending in ``id``), so
+any page costs one index range scan and rows inserted while a client is
+paging never shift or repeat what it sees.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _descending(field):
+    return field.startswith('-')
+
+
+def _reverse(field):
+    return field[1:] if _descending(field) else f'-{field}'
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate on a composite sort key, in both directions.
+
+    ``orderings`` maps each ``?ordering=`` value a client may use to the
+    full key it is paginated on; anything else is rejected rather than
+    silently falling back to a slow or unstable order.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering_query_param = api_settings.ORDERING_PARAM
+    orderings = {}
+    default_ordering = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [_reverse(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(ordering, self.position))
+
+        # One extra row tells us whether there is anything beyond this page
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = self.position is not None, has_more
+        return self.page
+
+    def _after(self, ordering, position):
+        """
+        ``(a, b, c) > (x, y, z)`` spelled out per column, honouring each
+        column's direction: ``a >= x AND (a > x OR (a = x AND b > y) OR ...)``.
+
+        The leading ``a >= x`` is implied by the rest, but it is the only
+        part the planner can use as the start of the index range scan;
+        without it the scan starts at the top of the index and filters.
+        """
+        condition = Q()
+        for depth, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if _descending(field) else 'gt'
+            step = Q(**{f'{name}__{lookup}': position[depth]})
+            for prefix in range(depth):
+                step &= Q(**{self.fields[prefix]: position[prefix]})
+            condition |= step
+        first = ordering[0]
+        bound = 'lte' if _descending(first) else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': position[0]}) & condition
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request):
+        value = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        if value not in self.orderings:
+            raise ValidationError({
+                self.ordering_query_param: 'Cursor pagination supports ordering by '
+                                           + ', '.join(self.orderings)
+            })
+        return list(self.orderings[value])
+
+    def decode_cursor(self, request, model):
+        """Return ``(position, reverse)``; the position is ``None`` on the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+            return position, bool(payload.get('r'))
+        except (ValueError, KeyError, TypeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for name in self.fields:
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'p': values, 'r': int(reverse)})
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            return self.encode_cursor(self.page[-1], reverse=False)
+        if self.position is None:
+            return None
+        # An empty page reached backwards: resume from where we came from
+        return self._link_from_position(reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            return self.encode_cursor(self.page[0], reverse=True)
+        return self._link_from_position(reverse=True)
+
+    def _link_from_position(self, reverse):
+        return self.encode_cursor(dict(zip(self.fields, self.position)), reverse)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class IssueCursorPagination(KeysetPagination):
+    orderings = {
+        '-created_at': ('-created_at', '-id'),
+        'created_at': ('created_at', 'id'),
+        '-upvotes': ('-upvotes', '-created_at', '-id'),
+        'upvotes': ('upvotes', 'created_at', 'id'),
+    }
+    default_ordering = '-created_at'
+
+
+class CommentCursorPagination(KeysetPagination):
+    orderings = {
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+    }
+    default_ordering = 'created_at'
+
+
+class KeysetPaginationMixin:
+    """
+    Use ``cursor_pagination_class`` when a request asks for it with
+    ``?pagination=cursor`` or by sending a ``cursor``, and the regular page
+    numbers otherwise, so existing clients keep working unchanged.
+    """
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if self.cursor_pagination_class and (
+                params.get('pagination') == 'cursor'
+                or self.cursor_pagination_class.cursor_query_param in params
+            ):
+                self._paginator = self.cursor_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
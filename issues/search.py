@@ -0,0 +1,41 @@
+"""
+Full-text search over issues.
+
+``Issue.search_vector`` holds the weighted document (title A, description
+B, address C). A database trigger, created in migration 0009, keeps it
+current on every insert and update, including ``bulk_create`` and
+``QuerySet.update()``; ``SEARCH_VECTOR`` is the same expression in ORM
+form, used to backfill existing rows.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db.models import F
+
+SEARCH_CONFIG = 'english'
+
+SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    + SearchVector('address', weight='C', config=SEARCH_CONFIG)
+)
+
+
+def search_issues(queryset, text):
+    """
+    Filter ``queryset`` to issues matching ``text``, annotated with a
+    ``search_rank``; matches are answered by the GIN index on
+    ``search_vector``.
+
+    When nothing matches and ``ISSUE_SEARCH_TRIGRAM_FALLBACK`` is on, fall
+    back to titles that are trigram-similar to the text, which catches
+    typos; that lookup uses the trigram index on ``title``.
+    """
+    query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+    matches = queryset.filter(search_vector=query)
+    if settings.ISSUE_SEARCH_TRIGRAM_FALLBACK and not matches.exists():
+        return queryset.filter(title__trigram_word_similar=text).annotate(
+            search_rank=TrigramWordSimilarity(text, 'title'),
+        )
+    return matches.annotate(search_rank=SearchRank(F('search_vector'), query))
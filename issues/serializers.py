@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from .duplicates import OPEN_STATUSES
 from .models import Issue, IssueCategory, IssueComment, IssueUpvote
+from .fieldsets import SparseFieldsetMixin
 from django.contrib.gis.geos import Point
 
 class IssueCategorySerializer(serializers.ModelSerializer):
@@ -8,13 +10,20 @@ class IssueCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'icon', 'description']
 
 
-class IssueSerializer(serializers.ModelSerializer):
+class IssueSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     reporter_username = serializers.CharField(source='reporter.username', read_only=True)
-    latitude = serializers.FloatField(write_only=True)
-    longitude = serializers.FloatField(write_only=True)
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
     upvote_count = serializers.IntegerField(source='upvotes', read_only=True)
-    comment_count = serializers.IntegerField(source='comments.count', read_only=True)
+    
+    presets = {
+        'card': ['id', 'title', 'category_name', 'latitude', 'longitude', 'status',
+                 'upvote_count', 'comment_count', 'created_at'],
+        'marker': ['id', 'latitude', 'longitude', 'status'],
+        'full': None,
+    }
+    column_sources = {'latitude': ['location'], 'longitude': ['location']}
     
     class Meta:
         model = Issue
@@ -22,16 +31,67 @@ class IssueSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'category', 'category_name',
             'reporter', 'reporter_username', 'latitude', 'longitude',
             'address', 'ward', 'zone', 'image', 'status', 'privacy',
-            'upvote_count', 'comment_count', 'is_duplicate', 'duplicate_of',
-            'created_at', 'updated_at', 'resolved_at'
+            'upvote_count', 'comment_count', 'affected_count', 'is_duplicate', 'duplicate_of',
+            'external_id', 'created_at', 'updated_at', 'resolved_at'
+        ]
+        read_only_fields = [
+            'reporter', 'upvotes', 'comment_count', 'affected_count', 'external_id',
+            'created_at', 'updated_at'
         ]
-        read_only_fields = ['reporter', 'upvotes', 'created_at', 'updated_at']
+    
+    def validate_duplicate_of(self, value):
+        # Only open issues the reporter can see; anything else gets the same
+        # error as a missing id, so hidden ids cannot be probed
+        if value is None:
+            return value
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        visible = Issue.objects.filter(is_duplicate=False, status__in=OPEN_STATUSES)
+        if user is None or not user.is_authenticated or not user.is_authority:
+            visible = visible.filter(privacy='public')
+        if not visible.filter(pk=value.pk).exists():
+            raise serializers.ValidationError(f'Invalid pk "{value.pk}" - object does not exist.')
+        return value
     
     def create(self, validated_data):
         latitude = validated_data.pop('latitude')
         longitude = validated_data.pop('longitude')
         validated_data['location'] = Point(longitude, latitude)
         return super().create(validated_data)
+    
+    def update(self, instance, validated_data):
+        if 'latitude' in validated_data or 'longitude' in validated_data:
+            latitude = validated_data.pop('latitude', instance.latitude)
+            longitude = validated_data.pop('longitude', instance.longitude)
+            validated_data['location'] = Point(longitude, latitude)
+        return super().update(instance, validated_data)
+
+
+class IssueImportSerializer(serializers.Serializer):
+    """One row of a bulk import; ``category`` may be an id, name or slug."""
+    external_id = serializers.CharField(max_length=100)
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField()
+    category = serializers.CharField()
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    address = serializers.CharField(max_length=500)
+    ward = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    zone = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    privacy = serializers.ChoiceField(choices=Issue.PRIVACY_CHOICES, default='public')
+    
+    def validate_category(self, value):
+        # Resolved from a lookup loaded once per import, not a query per row
+        try:
+            return self.context['categories'][value.strip().lower()]
+        except KeyError:
+            raise serializers.ValidationError('Unknown category')
+
+
+class BulkTransitionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    status = serializers.ChoiceField(choices=Issue.STATUS_CHOICES)
+    note = serializers.CharField(required=False, allow_blank=True, default='')
 
 
 class IssueCommentSerializer(serializers.ModelSerializer):
@@ -43,18 +103,25 @@ class IssueCommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at', 'updated_at']
 
 
-class IssueMapSerializer(serializers.ModelSerializer):
+class IssueMapSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     lat = serializers.SerializerMethodField()
     lng = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
+    presets = {
+        'card': ['id', 'title', 'status', 'status_display', 'lat', 'lng', 'upvotes'],
+        'marker': ['id', 'status', 'lat', 'lng'],
+        'full': None,
+    }
+    column_sources = {'lat': ['location'], 'lng': ['location'], 'status_display': ['status']}
+    
     class Meta:
         model = Issue
         fields = ['id', 'title', 'description', 'status', 'status_display', 
                   'lat', 'lng', 'upvotes', 'image']
     
     def get_lat(self, obj):
-        return obj.location.y
+        return obj.latitude
     
     def get_lng(self, obj):
-        return obj.location.x
+        return obj.longitude
@@ -1,18 +1,27 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Issue, IssueStatusUpdate
+from . import counters
+from .boundaries import invalidate_index
+from .caching import bump_generation, bump_jurisdictions
+from .models import (
+    AffectedUser, Boundary, Issue, IssueCategory, IssueComment, IssueStatusUpdate, IssueTombstone
+)
 from .tasks import (
     send_status_update_email, 
     notify_affected_users,
     send_new_issue_notification
 )
+from .tiles import invalidate_tiles
 
 @receiver(post_save, sender=Issue)
 def issue_created(sender, instance, created, **kwargs):
-    if created:
-        # Send notifications to authorities
-        send_new_issue_notification.delay(instance.id)
+    if created and not instance.is_duplicate:
+        # Send notifications to authorities, once the issue is committed
+        # (Issue.save() runs in a transaction)
+        transaction.on_commit(lambda: send_new_issue_notification.delay(instance.id))
 
 
 @receiver(pre_save, sender=Issue)
@@ -20,6 +29,10 @@ def track_status_change(sender, instance, **kwargs):
     if instance.pk:
         try:
             old_instance = Issue.objects.get(pk=instance.pk)
+            instance._previous_location = old_instance.location
+            instance._previous_visibility = (old_instance.privacy, old_instance.is_duplicate)
+            instance._previous_counted = (old_instance.status, old_instance.category_id)
+            instance._previous_jurisdiction = (old_instance.ward, old_instance.zone)
             if old_instance.status != instance.status:
                 # Create status update record
                 IssueStatusUpdate.objects.create(
@@ -30,15 +43,129 @@ def track_status_change(sender, instance, **kwargs):
                 )
                 
                 # Send notification
-                send_status_update_email.delay(
+                old_status, new_status = old_instance.status, instance.status
+                transaction.on_commit(lambda: send_status_update_email.delay(
                     instance.id,
-                    old_instance.status,
-                    instance.status
-                )
+                    old_status,
+                    new_status
+                ))
                 
                 # If resolved, notify affected users
                 if instance.status == 'resolved':
                     instance.resolved_at = timezone.now()
-                    notify_affected_users.delay(instance.id)
+                    transaction.on_commit(lambda: notify_affected_users.delay(instance.id))
         except Issue.DoesNotExist:
-            pass
\ No newline at end of file
+            pass
+
+
+@receiver(post_save, sender=Issue)
+def invalidate_map_tiles(sender, instance, **kwargs):
+    # Covers both ends of a move as well as status/privacy changes in place.
+    # After commit, or a tile rendered in between would cache the old rows
+    # under the new version
+    points = [getattr(instance, '_previous_location', None), instance.location]
+    transaction.on_commit(lambda: invalidate_tiles(points))
+
+
+@receiver(post_delete, sender=Issue)
+def invalidate_deleted_issue_tiles(sender, instance, **kwargs):
+    points = [instance.location]
+    transaction.on_commit(lambda: invalidate_tiles(points))
+
+
+@receiver(post_save, sender=Issue)
+def record_hidden_issue(sender, instance, created, **kwargs):
+    # Sync clients must drop issues that leave their view
+    previous = getattr(instance, '_previous_visibility', None)
+    if created or previous is None:
+        return
+    was_private, was_duplicate = previous[0] != 'public', previous[1]
+    if not was_duplicate and instance.is_duplicate:
+        IssueTombstone.objects.create(issue_id=instance.pk, reason='duplicate')
+    elif not was_private and instance.privacy != 'public':
+        IssueTombstone.objects.create(issue_id=instance.pk, reason='private')
+
+
+@receiver(post_delete, sender=Issue)
+def record_deleted_issue(sender, instance, **kwargs):
+    IssueTombstone.objects.create(issue_id=instance.pk, reason='deleted')
+
+
+@receiver(post_save, sender=Issue)
+def count_issue_saved(sender, instance, created, **kwargs):
+    current = (instance.status, instance.category_id)
+    if created:
+        counters.adjust(counters.deltas_for([current]))
+        return
+    previous = getattr(instance, '_previous_counted', None)
+    if previous is not None and previous != current:
+        counters.adjust(counters.moved([previous], [current]))
+
+
+@receiver(post_delete, sender=Issue)
+def count_issue_deleted(sender, instance, **kwargs):
+    counters.adjust(counters.deltas_for([(instance.status, instance.category_id)], -1))
+
+
+@receiver(post_save, sender=Issue)
+def invalidate_dashboard_figures(sender, instance, **kwargs):
+    # Both jurisdictions when the issue moved between them
+    pairs = [(instance.ward, instance.zone)]
+    if getattr(instance, '_previous_jurisdiction', None):
+        pairs.append(instance._previous_jurisdiction)
+    # After commit, or a dashboard loaded in between would store the old
+    # figures under the new generation
+    transaction.on_commit(lambda: bump_jurisdictions(pairs))
+
+
+@receiver(post_delete, sender=Issue)
+def invalidate_deleted_issue_figures(sender, instance, **kwargs):
+    pairs = [(instance.ward, instance.zone)]
+    transaction.on_commit(lambda: bump_jurisdictions(pairs))
+
+
+def _adjust_count(issue_id, field, delta):
+    # A single atomic UPDATE, so concurrent comments never lose a count
+    Issue.objects.filter(pk=issue_id).update(**{field: F(field) + delta})
+
+
+@receiver(post_save, sender=IssueComment)
+def count_comment_added(sender, instance, created, **kwargs):
+    if created:
+        _adjust_count(instance.issue_id, 'comment_count', 1)
+
+
+@receiver(post_delete, sender=IssueComment)
+def count_comment_removed(sender, instance, **kwargs):
+    _adjust_count(instance.issue_id, 'comment_count', -1)
+
+
+@receiver(post_save, sender=AffectedUser)
+def count_affected_added(sender, instance, created, **kwargs):
+    if created:
+        _adjust_count(instance.issue_id, 'affected_count', 1)
+
+
+@receiver(post_delete, sender=AffectedUser)
+def count_affected_removed(sender, instance, **kwargs):
+    _adjust_count(instance.issue_id, 'affected_count', -1)
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+@receiver(post_save, sender=IssueCategory)
+@receiver(post_delete, sender=IssueCategory)
+@receiver(post_save, sender=IssueComment)
+@receiver(post_delete, sender=IssueComment)
+@receiver(post_save, sender=AffectedUser)
+@receiver(post_delete, sender=AffectedUser)
+def invalidate_api_responses(sender, **kwargs):
+    # After commit, or a request served in between would cache the old
+    # body under the new generation
+    transaction.on_commit(bump_generation)
+
+
+@receiver(post_save, sender=Boundary)
+@receiver(post_delete, sender=Boundary)
+def reload_boundaries(sender, **kwargs):
+    invalidate_index()
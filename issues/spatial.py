@@ -0,0 +1,95 @@
+import math
+
+from django.contrib.gis.db.models import GeometryField
+from django.db.models import BinaryField, FloatField, Func, Value
+
+# Web Mercator cannot represent the poles; clamp latitudes to its valid range.
+MAX_LATITUDE = 85.05112878
+
+# Zoom levels a web map can ask for
+MIN_ZOOM = 0
+MAX_ZOOM = 22
+
+
+def tile_for_point(lng, lat, zoom):
+    """Return the (x, y) slippy-map tile containing a WGS84 point at ``zoom``."""
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    n = 2 ** zoom
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(zoom, x, y):
+    """Return the (west, south, east, north) WGS84 bounds of a slippy-map tile."""
+    n = 2 ** zoom
+
+    def lat_of(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (
+        x / n * 360.0 - 180.0,
+        lat_of(y + 1),
+        (x + 1) / n * 360.0 - 180.0,
+        lat_of(y),
+    )
+
+
+def is_valid_tile(zoom, x, y):
+    n = 2 ** zoom
+    return 0 <= x < n and 0 <= y < n
+
+
+def parse_bbox(value):
+    """
+    Parse a ``west,south,east,north`` string, as sent by Leaflet's
+    ``toBBoxString()``, into a tuple clamped to valid WGS84 ranges.
+    """
+    try:
+        west, south, east, north = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError('bbox must be "west,south,east,north"')
+
+    west, east = max(west, -180.0), min(east, 180.0)
+    south, north = max(south, -90.0), min(north, 90.0)
+    if west > east or south > north:
+        raise ValueError('bbox must be "west,south,east,north"')
+    return west, south, east, north
+
+
+def check_zoom(zoom):
+    if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        raise ValueError(f'zoom must be between {MIN_ZOOM} and {MAX_ZOOM}')
+    return zoom
+
+
+class X(Func):
+    """``ST_X(point)`` - the longitude of a point, computed in SQL."""
+    function = 'ST_X'
+    output_field = FloatField()
+
+
+class Y(Func):
+    """``ST_Y(point)`` - the latitude of a point, computed in SQL."""
+    function = 'ST_Y'
+    output_field = FloatField()
+
+
+class TileEnvelope(Func):
+    """``ST_TileEnvelope(z, x, y)`` - the Web Mercator bounds of a tile."""
+    function = 'ST_TileEnvelope'
+    output_field = GeometryField(srid=3857)
+
+    def __init__(self, zoom, x, y, **extra):
+        super().__init__(Value(zoom), Value(x), Value(y), **extra)
+
+
+class AsMVTGeom(Func):
+    """
+    ``ST_AsMVTGeom(geom, bounds)`` - a geometry in tile coordinate space.
+
+    Only ever used inside the ``ST_AsMVT`` subquery, so it is declared as a
+    plain column to stop GeoDjango from casting the selection to bytea.
+    """
+    function = 'ST_AsMVTGeom'
+    output_field = BinaryField()
@@ -0,0 +1,96 @@
+"""
+Incremental "changes since" sync for clients that keep a local copy.
+
+A cursor is an opaque token holding the last (updated_at, id) pair the
+client has seen and the last tombstone id. Rows are only handed out once
+they are ``ISSUE_SYNC_LAG`` seconds old, so a transaction that commits
+slightly after another, with an earlier timestamp or id, is not skipped.
+
+Writes made with ``QuerySet.update()`` (counters, upvotes) do not touch
+``updated_at`` and therefore do not show up here; bulk paths that change
+what a client displays must set ``updated_at`` themselves.
+"""
+import base64
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import IssueTombstone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(updated_at, issue_id, tombstone_id, issued_at):
+    payload = json.dumps({
+        't': updated_at.isoformat(),
+        'i': issue_id,
+        'd': tombstone_id,
+        'a': issued_at.isoformat(),
+    })
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(value):
+    """Return ``(updated_at, issue_id, tombstone_id, issued_at)``."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(value.encode()))
+        return (
+            datetime.fromisoformat(payload['t']),
+            int(payload['i']),
+            int(payload['d']),
+            datetime.fromisoformat(payload['a']),
+        )
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid sync cursor')
+
+
+def changes_since(queryset, cursor, limit, include_private=False):
+    """
+    Return ``(changed, removed_ids, next_cursor, has_more, reset)``.
+
+    ``queryset`` is what the client may see; ``include_private`` keeps
+    privacy tombstones from removing issues authorities can still see.
+    """
+    now = timezone.now()
+    horizon = now - timedelta(seconds=settings.ISSUE_SYNC_LAG)
+    retention = now - timedelta(days=settings.ISSUE_SYNC_RETENTION_DAYS)
+
+    reset = False
+    if cursor:
+        updated_at, last_id, last_tombstone, issued_at = decode_cursor(cursor)
+        # Tombstones created since then may have been pruned already
+        reset = issued_at < retention
+    if not cursor or reset:
+        # A fresh copy needs no deletions from before it started
+        updated_at, last_id = EPOCH, 0
+        last_tombstone = IssueTombstone.objects.aggregate(last=Max('id'))['last'] or 0
+
+    changed = list(
+        queryset
+        .filter(updated_at__lte=horizon)
+        .filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=last_id))
+        .order_by('updated_at', 'id')[:limit + 1]
+    )
+
+    tombstones = IssueTombstone.objects.filter(id__gt=last_tombstone, created_at__lte=horizon)
+    if include_private:
+        tombstones = tombstones.exclude(reason='private')
+    tombstones = list(tombstones.order_by('id').values_list('id', 'issue_id')[:limit + 1])
+
+    has_more = len(changed) > limit or len(tombstones) > limit
+    changed, tombstones = changed[:limit], tombstones[:limit]
+
+    if changed:
+        updated_at, last_id = changed[-1].updated_at, changed[-1].id
+    if tombstones:
+        last_tombstone = tombstones[-1][0]
+
+    # An issue hidden and shown again inside one window is simply changed
+    changed_ids = {issue.id for issue in changed}
+    removed = sorted({issue_id for _, issue_id in tombstones} - changed_ids)
+
+    next_cursor = encode_cursor(updated_at, last_id, last_tombstone, now)
+    return changed, removed, next_cursor, has_more, reset
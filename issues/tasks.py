@@ -2,8 +2,18 @@ from celery import shared_task
 from django.core.mail import send_mail, send_mass_mail
 from django.conf import settings
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import Count, Extent, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from datetime import timedelta
-from .models import Issue
+from .heatmap import build_grids, load_points, pack_cells
+from .hotspots import build_hotspots
+from .models import (
+    AffectedUser, HeatmapGrid, Hotspot, Issue, IssueCategory, IssueComment, IssueTombstone
+)
+from .caching import bump_all_jurisdictions, bump_generation
+from .spatial import X, Y
+from . import counters, upvotes
 from users.models import CustomUser
 
 @shared_task
@@ -62,6 +72,75 @@ def notify_affected_users(issue_id):
         pass
 
 
+def _group_by_recipient(pairs):
+    grouped = {}
+    for user, issue in pairs:
+        grouped.setdefault(user.email, []).append(issue)
+    return grouped
+
+
+@shared_task
+def send_status_update_emails(changes):
+    # Grouped form of send_status_update_email for bulk transitions: one
+    # email per reporter covering all of their issues in the batch
+    statuses = {issue_id: (old_status, new_status) for issue_id, old_status, new_status in changes}
+    issues = Issue.objects.filter(
+        id__in=statuses,
+        reporter__email_notifications=True
+    ).select_related('reporter')
+    
+    email_list = []
+    for email, reporter_issues in _group_by_recipient((issue.reporter, issue) for issue in issues).items():
+        lines = '\n'.join(
+            f'- {issue.title}: {statuses[issue.id][0]} to {statuses[issue.id][1]} '
+            f'({settings.SITE_URL}/issue/{issue.id}/)'
+            for issue in reporter_issues
+        )
+        if len(reporter_issues) == 1:
+            subject = f'Issue Update: {reporter_issues[0].title}'
+        else:
+            subject = f'{len(reporter_issues)} of Your Issues Were Updated'
+        message = f'''
+            Your reported issues have been updated:
+            
+{lines}
+            '''
+        email_list.append((subject, message, settings.DEFAULT_FROM_EMAIL, [email]))
+    
+    if email_list:
+        send_mass_mail(email_list, fail_silently=False)
+    return f"Sent {len(email_list)} status update emails"
+
+
+@shared_task
+def notify_affected_users_bulk(issue_ids):
+    # Grouped form of notify_affected_users for bulk resolutions
+    affected = AffectedUser.objects.filter(
+        issue_id__in=issue_ids,
+        user__email_notifications=True
+    ).select_related('user', 'issue')
+    
+    email_list = []
+    for email, issues in _group_by_recipient((row.user, row.issue) for row in affected).items():
+        lines = '\n'.join(
+            f'- {issue.title} ({settings.SITE_URL}/issue/{issue.id}/)' for issue in issues
+        )
+        if len(issues) == 1:
+            subject = f'Issue Resolved: {issues[0].title}'
+        else:
+            subject = f'{len(issues)} Issues Affecting You Were Resolved'
+        message = f'''
+            Issues you marked as affecting you have been resolved:
+            
+{lines}
+            '''
+        email_list.append((subject, message, settings.DEFAULT_FROM_EMAIL, [email]))
+    
+    if email_list:
+        send_mass_mail(email_list, fail_silently=False)
+    return f"Sent {len(email_list)} resolution emails"
+
+
 @shared_task
 def send_daily_digest():
     # Send daily digest to authorities
@@ -142,3 +221,170 @@ def send_new_issue_notification(issue_id):
             send_mass_mail(email_list, fail_silently=False)
     except Issue.DoesNotExist:
         pass
+
+
+@shared_task
+def send_new_issues_notification(issue_ids):
+    # One email per authority for a whole batch of imported issues, with the
+    # same ward/zone matching as send_new_issue_notification
+    issues = list(Issue.objects.filter(id__in=issue_ids).select_related('category'))
+    authorities = CustomUser.objects.filter(
+        user_type__in=['authority', 'admin'],
+        email_notifications=True
+    )
+    
+    email_list = []
+    for authority in authorities:
+        relevant = [
+            issue for issue in issues
+            if (not issue.ward or issue.ward == authority.ward)
+            and (not issue.zone or issue.zone == authority.zone)
+        ]
+        if not relevant:
+            continue
+        
+        listing = '\n'.join(
+            f'- {issue.title} ({issue.category.name}, {issue.address}): '
+            f'{settings.SITE_URL}/issue/{issue.id}/'
+            for issue in relevant
+        )
+        subject = f'{len(relevant)} New Issues Reported'
+        message = f'''
+            New issues have been reported in your jurisdiction:
+            
+{listing}
+            '''
+        email_list.append((
+            subject,
+            message,
+            settings.DEFAULT_FROM_EMAIL,
+            [authority.email]
+        ))
+    
+    if email_list:
+        send_mass_mail(email_list, fail_silently=False)
+    return f"Notified {len(email_list)} authorities about {len(issues)} issues"
+
+
+@shared_task
+def build_heatmaps():
+    issues = Issue.objects.filter(privacy='public', is_duplicate=False)
+    extent = issues.aggregate(extent=Extent('location'))['extent']
+    if extent is None:
+        return "No issues to map"
+    
+    points = load_points(issues)
+    grids = []
+    for band, category_id, weighting, rows, cols, grid in build_grids(points, extent):
+        cells, max_value = pack_cells(grid)
+        grids.append(HeatmapGrid(
+            band=band,
+            category_id=category_id,
+            weighting=weighting,
+            west=extent[0],
+            south=extent[1],
+            east=extent[2],
+            north=extent[3],
+            rows=rows,
+            cols=cols,
+            max_value=max_value,
+            cells=cells,
+        ))
+    
+    # Swap the whole set at once so readers never see a partial rebuild
+    with transaction.atomic():
+        HeatmapGrid.objects.all().delete()
+        HeatmapGrid.objects.bulk_create(grids, batch_size=10)
+    
+    return f"Built {len(grids)} heatmap grids from {len(points)} issues"
+
+
+
+@shared_task
+def prune_sync_tombstones():
+    threshold = timezone.now() - timedelta(days=settings.ISSUE_SYNC_RETENTION_DAYS)
+    deleted_count = IssueTombstone.objects.filter(created_at__lt=threshold).delete()[0]
+    return f"Deleted {deleted_count} sync tombstones"
+
+
+@shared_task
+def flush_upvotes():
+    flushed = upvotes.flush_upvotes()
+    return f"Flushed buffered upvotes for {flushed} issues"
+
+
+def _count_per_issue(model):
+    return Coalesce(Subquery(
+        model.objects.filter(issue=OuterRef('pk')).order_by()
+        .values('issue').annotate(count=Count('id')).values('count')
+    ), Value(0))
+
+
+@shared_task
+def reconcile_engagement_counts(batch_size=5000):
+    """Repair comment/affected counters that drifted from the real rows."""
+    repaired = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Issue.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        
+        drifted = list(
+            Issue.objects.filter(pk__gte=ids[0], pk__lte=last_id)
+            .annotate(
+                actual_comments=_count_per_issue(IssueComment),
+                actual_affected=_count_per_issue(AffectedUser),
+            )
+            .exclude(comment_count=F('actual_comments'), affected_count=F('actual_affected'))
+            .values_list('pk', flat=True)
+        )
+        if drifted:
+            # Recount at write time rather than writing the values read above,
+            # so comments added in between are not lost
+            repaired += Issue.objects.filter(pk__in=drifted).update(
+                comment_count=_count_per_issue(IssueComment),
+                affected_count=_count_per_issue(AffectedUser),
+            )
+    
+    if repaired:
+        bump_generation()
+    return f"Repaired engagement counts on {repaired} issues"
+
+
+@shared_task
+def recount_issue_counters():
+    wrong = counters.recount()
+    return f"Recounted issue counters, {wrong} were off"
+
+
+@shared_task
+def detect_hotspots():
+    since = timezone.now() - timedelta(days=settings.HOTSPOT_WINDOW_DAYS)
+    issues = Issue.objects.filter(
+        status__in=['pending', 'in_progress'],
+        is_duplicate=False,
+        created_at__gte=since
+    ).annotate(lng=X('location'), lat=Y('location')).order_by()
+    
+    hotspots = []
+    for category_id in IssueCategory.objects.values_list('id', flat=True):
+        rows = list(
+            issues.filter(category_id=category_id)
+            .values_list('lng', 'lat', 'upvotes', 'ward', 'zone')
+        )
+        for hotspot in build_hotspots(rows, settings.HOTSPOT_EPS_METERS, settings.HOTSPOT_MIN_ISSUES):
+            hotspots.append(Hotspot(category_id=category_id, **hotspot))
+    
+    # Swap the whole set at once so the dashboard never sees a partial run
+    with transaction.atomic():
+        Hotspot.objects.all().delete()
+        Hotspot.objects.bulk_create(hotspots, batch_size=500)
+    # Every dashboard lists hotspots
+    bump_all_jurisdictions()
+    
+    return f"Detected {len(hotspots)} hotspots"
@@ -1,11 +1,43 @@
-from django.test import TestCase, Client
+import base64
+import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, Client, override_settings
 from django.contrib.auth import get_user_model
-from django.contrib.gis.geos import Point
-from .models import Issue, IssueCategory, IssueComment, IssueUpvote
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from locallens.throttling import shed_counts
+from .models import AffectedUser, Boundary, Issue, IssueCategory, IssueComment, IssueCounter, IssueUpvote
+from . import columnar, counters, geohash
+from .heatmap import build_grids
+from .forms import IssueReportForm
+from .hotspots import dbscan, project
+from .pagination import IssueCursorPagination
+from .serializers import IssueMapSerializer, IssueSerializer
+from .spatial import tile_bounds, tile_for_point
+from .tasks import build_heatmaps, reconcile_engagement_counts
+from .upvotes import flush_upvotes, toggle_upvote
 
 User = get_user_model()
 
-class IssueModelTest(TestCase):
+class IssueFactoryMixin:
+    def _create_issue(self, **overrides):
+        fields = {
+            'title': 'Test Issue',
+            'description': 'Test description',
+            'category': self.category,
+            'reporter': self.user,
+            'location': Point(77.5946, 12.9716),
+            'address': 'Test Address',
+        }
+        fields.update(overrides)
+        return Issue.objects.create(**fields)
+
+
+class IssueModelTest(IssueFactoryMixin, TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
             username='testuser',
@@ -16,15 +48,7 @@ class IssueModelTest(TestCase):
             name='Test Category',
             slug='test-category'
         )
-        self.issue = Issue.objects.create(
-            title='Test Issue',
-            description='Test description',
-            category=self.category,
-            reporter=self.user,
-            location=Point(77.5946, 12.9716),
-            address='Test Address',
-            status='pending'
-        )
+        self.issue = self._create_issue(title='Test Issue', status='pending')
     
     def test_issue_creation(self):
         self.assertEqual(self.issue.title, 'Test Issue')
@@ -34,6 +58,60 @@ class IssueModelTest(TestCase):
     def test_issue_str(self):
         expected = 'Test Issue - Pending'
         self.assertEqual(str(self.issue), expected)
+    
+    def test_ward_assigned_from_boundary(self):
+        Boundary.objects.create(
+            name='Ward 7',
+            kind='ward',
+            geometry=MultiPolygon(Polygon.from_bbox((77.5, 12.9, 77.7, 13.0)))
+        )
+        issue = self._create_issue(title='Zoned Issue', location=Point(77.6, 12.95))
+        self.assertEqual(issue.ward, 'Ward 7')
+        self.assertEqual(issue.zone, '')
+    
+    def test_geohash_computed_on_save(self):
+        self.assertEqual(self.issue.geohash, geohash.encode(12.9716, 77.5946))
+        self.assertTrue(self.issue.geohash.startswith('tdr1'))
+    
+    def test_engagement_counts_follow_rows(self):
+        comment = IssueComment.objects.create(issue=self.issue, user=self.user, comment='Same here')
+        AffectedUser.objects.create(issue=self.issue, user=self.user)
+        self.issue.refresh_from_db()
+        self.assertEqual((self.issue.comment_count, self.issue.affected_count), (1, 1))
+        
+        comment.delete()
+        Issue.objects.filter(pk=self.issue.pk).update(affected_count=5)
+        reconcile_engagement_counts()
+        self.issue.refresh_from_db()
+        self.assertEqual((self.issue.comment_count, self.issue.affected_count), (0, 1))
+    
+    def test_save_keeps_concurrent_counter_increments(self):
+        stale = Issue.objects.get(pk=self.issue.pk)
+        IssueComment.objects.create(issue=self.issue, user=self.user, comment='Same here')
+        Issue.objects.filter(pk=self.issue.pk).update(upvotes=F('upvotes') + 1)
+        
+        stale.title = 'Renamed Issue'
+        stale.save()
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.title, 'Renamed Issue')
+        self.assertEqual((self.issue.comment_count, self.issue.upvotes), (1, 1))
+    
+    def test_counters_follow_issues(self):
+        other = IssueCategory.objects.create(name='Other Category', slug='other-category')
+        self.issue.status = 'resolved'
+        self.issue.category = other
+        self.issue.save()
+        totals = counters.snapshot()
+        self.assertEqual(totals[counters.TOTAL], 1)
+        self.assertEqual((totals['status:pending'], totals['status:resolved']), (0, 1))
+        self.assertEqual((totals[f'category:{self.category.pk}'], totals[f'category:{other.pk}']), (0, 1))
+        
+        self.issue.delete()
+        self.assertEqual(counters.snapshot()[counters.TOTAL], 0)
+        
+        IssueCounter.objects.filter(key=counters.TOTAL).update(value=7)
+        self.assertEqual(counters.recount(), 1)
+        self.assertEqual(counters.snapshot()[counters.TOTAL], 0)
 
 
 class IssueViewTest(TestCase):
@@ -62,7 +140,7 @@ class IssueViewTest(TestCase):
         self.assertEqual(response.status_code, 302)  # Redirect to login
 
 
-class IssueAPITest(TestCase):
+class IssueAPITest(IssueFactoryMixin, TestCase):
     def setUp(self):
         self.client = Client()
         self.user = User.objects.create_user(
@@ -70,10 +148,290 @@ class IssueAPITest(TestCase):
             password='apipass123'
         )
         self.category = IssueCategory.objects.create(name='API Test')
+        # The response cache generation only moves on commit, which never
+        # happens inside a TestCase
+        cache.clear()
     
     def test_api_list_issues(self):
         response = self.client.get('/api/issues/')
         self.assertEqual(response.status_code, 200)
+
+    def test_api_cursor_pagination(self):
+        issues = [
+            self._create_issue(title=f'Paged Issue {i}')
+            for i in range(3)
+        ]
+        first = self.client.get('/api/issues/', {'pagination': 'cursor', 'page_size': 2}).json()
+        self.assertEqual([i['id'] for i in first['results']], [issues[2].id, issues[1].id])
+        self.assertIsNone(first['previous'])
+
+        second = self.client.get(first['next']).json()
+        self.assertEqual([i['id'] for i in second['results']], [issues[0].id])
+        self.assertIsNone(second['next'])
+
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_cursor_starts_index_scan_at_position(self):
+        paginator = IssueCursorPagination()
+        paginator.fields = ['created_at', 'id']
+        issue = self._create_issue(title='Indexed Issue')
+        queryset = (
+            Issue.objects.filter(is_duplicate=False, privacy='public')
+            .order_by('-created_at', '-id')
+            .filter(paginator._after(['-created_at', '-id'], [issue.created_at, issue.id]))
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        # The cursor bounds the scan instead of being a filter on every row
+        self.assertIn('Index Cond', plan)
+        self.assertIn('created_at <=', plan.split('Index Cond', 1)[1].split('\n', 1)[0])
+    
+    def test_api_fast_path_matches_serializers(self):
+        self._create_issue(title='Fast Issue')
+        responses = []
+        for fast_path in [True, False]:
+            cache.clear()
+            with override_settings(ISSUE_API_FAST_PATH=fast_path):
+                responses.append((
+                    self.client.get('/api/issues/').json(),
+                    self.client.get('/api/issues/map_data/', {'zoom': 16, 'bbox': '77,12,78,13'}).json(),
+                ))
+        self.assertEqual(responses[0], responses[1])
+    
+    def test_async_views_match_api(self):
+        issue = self._create_issue(title='Async Issue')
+        self._create_issue(title='Older Async Issue', upvotes=3)
+        paths = [
+            f'/api/issues/{issue.pk}/',
+            '/api/issues/statistics/',
+            '/api/issues/map_data/?zoom=16&bbox=77,12,78,13',
+            '/api/issues/map_data/?ordering=-upvotes',
+            '/api/issues/map_data/?search=async',
+        ]
+        for path in paths:
+            expected = self.client.get(path).json()
+            self.assertEqual(self.client.get(path.replace('/api/', '/api/async/')).json(), expected)
+    
+    def test_async_views_accept_basic_auth(self):
+        User.objects.create_user(username='authority', password='authoritypass123', user_type='authority')
+        issue = self._create_issue(title='Private Issue', privacy='authorities_only')
+        path = f'/api/async/issues/{issue.pk}/'
+        credentials = base64.b64encode(b'authority:authoritypass123').decode()
+        
+        self.assertEqual(self.client.get(path).status_code, 404)
+        response = self.client.get(path, HTTP_AUTHORIZATION=f'Basic {credentials}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Private Issue')
+        
+        wrong = base64.b64encode(b'authority:wrong').decode()
+        response = self.client.get(path, HTTP_AUTHORIZATION=f'Basic {wrong}')
+        self.assertEqual(response.status_code, self.client.get(f'/api/issues/{issue.pk}/', HTTP_AUTHORIZATION=f'Basic {wrong}').status_code)
+    
+    def test_api_throttles_and_sheds(self):
+        issue = self._create_issue(title='Throttled Issue')
+        cache.clear()
+        self.client.login(username='apiuser', password='apipass123')
+        
+        with override_settings(THROTTLE_RATES={'vote': '2/min', 'report': '2/min', 'expensive': '2/min'}):
+            codes = [self.client.post(f'/api/issues/{issue.pk}/upvote/').status_code for _ in range(3)]
+            self.assertEqual(codes, [200, 200, 429])
+            self.assertEqual(self.client.post(f'/issue/{issue.pk}/upvote/')['Retry-After'], '30')
+        
+        with override_settings(CONCURRENCY_LIMITS={'expensive': 0}):
+            response = self.client.get('/api/issues/statistics/')
+            self.assertEqual(response.status_code, 503)
+            self.assertIn('Retry-After', response)
+        
+        counts = shed_counts()
+        self.assertEqual((counts['throttled', 'vote'], counts['busy', 'expensive']), (2, 1))
+    
+    def test_api_throttle_ignores_forged_forwarded_for(self):
+        issue = self._create_issue(title='Throttled Issue')
+        self.client.login(username='apiuser', password='apipass123')
+        
+        with override_settings(THROTTLE_IP_RATES={'vote': '2/min', 'report': '2/min', 'expensive': '2/min'}):
+            codes = [
+                self.client.post(f'/api/issues/{issue.pk}/upvote/', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code
+                for i in range(3)
+            ]
+        self.assertEqual(codes, [200, 200, 429])
+    
+    def test_api_sparse_fieldsets(self):
+        self._create_issue(title='Sparse Issue')
+        result = self.client.get('/api/issues/', {'fields': 'id,title,latitude'}).json()['results'][0]
+        self.assertEqual(set(result), {'id', 'title', 'latitude'})
+        self.assertAlmostEqual(result['latitude'], 12.9716)
+        
+        result = self.client.get('/api/issues/', {'preset': 'marker', 'omit': 'status'}).json()['results'][0]
+        self.assertEqual(set(result), {'id', 'latitude', 'longitude'})
+        
+        response = self.client.get('/api/issues/', {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_sparse_fieldsets_load_only_their_columns(self):
+        self._create_issue(title='Sparse Issue')
+        for serializer_class in (IssueSerializer, IssueMapSerializer):
+            for preset in serializer_class.presets:
+                fields = serializer_class.requested_fields({'preset': preset})
+                queryset = serializer_class.restrict_queryset(Issue.objects.all(), fields)
+                # One query: no deferred column or relation is loaded later
+                with self.assertNumQueries(1):
+                    issues = list(queryset)
+                    data = serializer_class(issues, many=True, fields=fields).data
+                self.assertEqual(set(data[0]), set(fields))
+                if preset != 'full':
+                    self.assertTrue(issues[0].get_deferred_fields())
+    
+    def test_api_search_ranked_with_typo_fallback(self):
+        for title, address in [('Broken streetlights', 'Main Road'), ('Deep pothole', 'Streetlight Lane')]:
+            self._create_issue(title=title, address=address)
+        results = self.client.get('/api/issues/', {'search': 'streetlight'}).json()['results']
+        self.assertEqual([i['title'] for i in results], ['Broken streetlights', 'Deep pothole'])
+
+        results = self.client.get('/api/issues/', {'search': 'potholle'}).json()['results']
+        self.assertEqual([i['title'] for i in results], ['Deep pothole'])
+
+    def test_api_conditional_get(self):
+        response = self.client.get('/api/issues/', HTTP_ACCEPT='application/json')
+        etag = response['ETag']
+        
+        response = self.client.get('/api/issues/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_issue(title='New Issue')
+        response = self.client.get('/api/issues/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+    
+    def test_api_bulk_import_is_resumable(self):
+        User.objects.create_user(username='partner', password='partnerpass123', user_type='authority')
+        self.client.login(username='partner', password='partnerpass123')
+        rows = (
+            'external_id,title,description,category,lat,lng,address\n'
+            'CC-1,Overflowing bin,Not collected,api test,12.97,77.59,MG Road\n'
+            'CC-2,Broken bench,Seat missing,Unknown,12.97,77.59,MG Road\n'
+        )
+        
+        response = self.client.post('/api/issues/import/', {
+            'file': SimpleUploadedFile('complaints.csv', rows.encode())
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['errors'][0]['row'], 3)
+        
+        response = self.client.post('/api/issues/import/', {
+            'file': SimpleUploadedFile('complaints.csv', rows.encode())
+        })
+        self.assertEqual((response.json()['created'], response.json()['skipped']), (0, 1))
+        self.assertEqual(Issue.objects.get(external_id='CC-1').title, 'Overflowing bin')
+    
+    def test_api_export_streams_visible_issues(self):
+        for privacy in ['public', 'authorities_only']:
+            self._create_issue(title=f'Export {privacy}', privacy=privacy)
+        self.client.login(username='apiuser', password='apipass123')
+        
+        response = self.client.get('/api/issues/export/', {'export_format': 'geojson'})
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        features = json.loads(b''.join(response.streaming_content))['features']
+        self.assertEqual([feature['properties']['title'] for feature in features], ['Export public'])
+        self.assertEqual(features[0]['geometry']['coordinates'], [77.5946, 12.9716])
+        
+        response = self.client.get('/api/issues/export/', {'export_format': 'csv', 'status': 'resolved'})
+        self.assertEqual(b''.join(response.streaming_content).decode().count('\n'), 1)
+    
+    def test_api_bulk_transition(self):
+        issues = [
+            self._create_issue(title='Bulk Issue', status=status)
+            for status in ['pending', 'resolved']
+        ]
+        ids = [issue.pk for issue in issues]
+        
+        response = self.client.post('/api/issues/bulk_transition/', {'ids': ids, 'status': 'resolved'}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        
+        User.objects.create_user(username='authority', password='authoritypass123', user_type='authority')
+        self.client.login(username='authority', password='authoritypass123')
+        response = self.client.post('/api/issues/bulk_transition/', {
+            'ids': ids, 'status': 'resolved', 'note': 'Cleared'
+        }, content_type='application/json')
+        self.assertEqual(response.json(), {'updated': [ids[0]], 'unchanged': [ids[1]]})
+        issues[0].refresh_from_db()
+        self.assertEqual(issues[0].status, 'resolved')
+        self.assertIsNotNone(issues[0].resolved_at)
+        self.assertEqual(list(issues[0].status_updates.values_list('old_status', 'note')), [('pending', 'Cleared')])
+    
+    def test_api_map_data_clusters(self):
+        self._create_issue(title='Clustered Issue')
+        response = self.client.get('/api/issues/map_data/', {'zoom': 5, 'bbox': '68,8,97,35'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['mode'], 'clusters')
+        self.assertEqual(response.json()['clusters'][0]['count'], 1)
+    
+    def test_api_map_data_viewport_limit(self):
+        for upvotes, lng in [(5, 77.59), (9, 77.60), (1, 80.0)]:
+            self._create_issue(title='Viewport Issue', location=Point(lng, 12.97), upvotes=upvotes)
+        response = self.client.get('/api/issues/map_data/', {
+            'zoom': 16, 'bbox': '77.5,12.9,77.7,13.0', 'limit': 1
+        })
+        data = response.json()
+        self.assertEqual(data['mode'], 'points')
+        self.assertTrue(data['truncated'])
+        self.assertEqual([issue['upvotes'] for issue in data['results']], [9])
+    
+    def test_api_map_data_columnar(self):
+        self._create_issue(title='Columnar Issue')
+        response = self.client.get('/api/issues/map_data/', {'zoom': 16, 'format': 'columnar'})
+        self.assertEqual(response['Content-Type'], 'application/vnd.locallens.columnar')
+        columns, header = columnar.decode(response.content)
+        self.assertEqual(header['categories'], ['API Test'])
+        self.assertAlmostEqual(columnar.undelta_coordinates(columns['lat'])[0], 12.9716)
+        self.assertEqual(header['statuses'][columns['status'][0]], 'pending')
+    
+    def test_api_map_data_invalid_bbox(self):
+        response = self.client.get('/api/issues/map_data/', {'zoom': 5, 'bbox': 'nope'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_api_map_data_invalid_zoom(self):
+        for path in ['/api/issues/map_data/', '/api/async/issues/map_data/']:
+            for zoom in (-2000, 23):
+                response = self.client.get(path, {'zoom': zoom})
+                self.assertEqual(response.status_code, 400)
+    
+    def test_api_similar_issues(self):
+        self._create_issue(title='Deep pothole near bus stop', description='Pothole is growing')
+        response = self.client.get('/api/issues/similar/', {
+            'lat': 12.9717, 'lng': 77.5947, 'category': self.category.id, 'text': 'pothole bus stop'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertGreater(response.json()[0]['similarity'], 0)
+        
+        response = self.client.get('/api/issues/similar/', {
+            'lat': 13.5, 'lng': 77.5947, 'category': self.category.id
+        })
+        self.assertEqual(response.json(), [])
+    
+    def test_duplicate_of_limited_to_public_open_issues(self):
+        hidden = self._create_issue(title='Private Issue', privacy='authorities_only')
+        form = IssueReportForm(data={'duplicate_of': hidden.pk})
+        form.is_valid()
+        self.assertIn('duplicate_of', form.errors)
+        
+        self.client.login(username='apiuser', password='apipass123')
+        response = self.client.post('/api/issues/', {
+            'title': 'Same issue',
+            'description': 'Test description',
+            'category': self.category.id,
+            'latitude': 12.9716,
+            'longitude': 77.5946,
+            'address': 'Test Address',
+            'duplicate_of': hidden.pk,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('duplicate_of', response.json())
     
     def test_api_create_issue_authenticated(self):
         self.client.login(username='apiuser', password='apipass123')
@@ -87,4 +445,112 @@ class IssueAPITest(TestCase):
             'image': None
         }
         response = self.client.post('/api/issues/', data)
-        self.assertEqual(response.status_code, 201)
\ No newline at end of file
+        self.assertEqual(response.status_code, 201)
+
+
+class IssueTileTest(TestCase):
+    def test_tile_for_point_inside_bounds(self):
+        for zoom in (0, 5, 12, 18):
+            x, y = tile_for_point(77.5946, 12.9716, zoom)
+            west, south, east, north = tile_bounds(zoom, x, y)
+            self.assertTrue(west <= 77.5946 < east)
+            self.assertTrue(south <= 12.9716 < north)
+    
+    def test_tile_view(self):
+        response = self.client.get('/tiles/0/0/0.mvt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+    
+    def test_tile_out_of_range(self):
+        response = self.client.get('/tiles/2/4/0.mvt')
+        self.assertEqual(response.status_code, 404)
+
+
+class HeatmapTest(IssueFactoryMixin, TestCase):
+    def test_build_grids_single_point(self):
+        points = np.array([[77.5946, 12.9716, 1, 0, 0]])
+        grids = list(build_grids(points, (77.5946, 12.9716, 77.5946, 12.9716)))
+        self.assertTrue(grids)
+        for band, category_id, weighting, rows, cols, grid in grids:
+            self.assertEqual((rows, cols), (1, 1))
+            self.assertGreater(grid[0, 0], 0)
+    
+    def test_heatmap_view(self):
+        self.user = User.objects.create_user(username='heatmapuser', password='testpass123')
+        self.category = IssueCategory.objects.create(name='Test Category')
+        for lng, lat in [(77.5946, 12.9716), (77.6046, 12.9816)]:
+            self._create_issue(title='Heatmap Issue', location=Point(lng, lat))
+        build_heatmaps()
+        
+        response = self.client.get('/api/issues/heatmap/', {'zoom': 12, 'weight': 'count'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        for actual, expected in zip(data['bounds'], [77.5946, 12.9716, 77.6046, 12.9816]):
+            self.assertAlmostEqual(actual, expected)
+        self.assertTrue(data['points'])
+        self.assertTrue(all(0 < intensity <= 1 for _, _, intensity in data['points']))
+        
+        response = self.client.get('/api/issues/heatmap/', {'weight': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+class HotspotTest(TestCase):
+    def test_dbscan_separates_dense_cluster_from_noise(self):
+        # Six issues within ~30 m of each other, and two far away
+        lng = [77.5946, 77.5947, 77.5948, 77.5946, 77.5947, 77.5948, 77.70, 77.80]
+        lat = [12.9716, 12.9716, 12.9716, 12.9717, 12.9717, 12.9717, 12.90, 12.80]
+        labels = dbscan(project(lng, lat), eps=100, min_samples=5)
+        self.assertEqual(list(labels), [0, 0, 0, 0, 0, 0, -1, -1])
+
+
+class IssueSyncTest(IssueFactoryMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='syncuser', password='syncpass123')
+        self.category = IssueCategory.objects.create(name='Sync Test')
+        self.issue = self._create_issue(title='Synced Issue')
+    
+    @override_settings(ISSUE_SYNC_LAG=0)
+    def test_sync_changes_and_removals(self):
+        data = self.client.get('/api/issues/sync/').json()
+        self.assertEqual([issue['id'] for issue in data['changed']], [self.issue.id])
+        
+        data = self.client.get('/api/issues/sync/', {'cursor': data['cursor']}).json()
+        self.assertEqual(data['changed'], [])
+        
+        self.issue.privacy = 'authorities_only'
+        self.issue.save()
+        data = self.client.get('/api/issues/sync/', {'cursor': data['cursor']}).json()
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(data['removed'], [self.issue.id])
+    
+    def test_sync_invalid_cursor(self):
+        response = self.client.get('/api/issues/sync/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+class UpvoteConcurrencyTest(IssueFactoryMixin, TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reporter', password='reporterpass123')
+        self.category = IssueCategory.objects.create(name='Upvote Test')
+        self.voters = [
+            User.objects.create_user(username=f'voter{i}', password='voterpass123')
+            for i in range(40)
+        ]
+        self.issue = self._create_issue(title='Popular Issue')
+    
+    @override_settings(UPVOTE_BUFFER_THRESHOLD=10)
+    def test_concurrent_toggles_lose_no_votes(self):
+        def vote(user):
+            try:
+                # Add, remove and add again: a net single vote per user
+                for _ in range(3):
+                    toggle_upvote(self.issue, user)
+            finally:
+                connection.close()
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(vote, self.voters))
+        flush_upvotes()
+        
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.upvotes, len(self.voters))
+        self.assertEqual(IssueUpvote.objects.filter(issue=self.issue).count(), len(self.voters))
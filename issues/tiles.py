@@ -0,0 +1,71 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Transform
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+
+from .spatial import AsMVTGeom, TileEnvelope, tile_bounds, tile_for_point
+
+TILE_LAYER_NAME = 'issues'
+
+
+def render_tile(queryset, zoom, x, y):
+    """Encode the issues of ``queryset`` that fall inside a tile as an MVT."""
+    envelope = Polygon.from_bbox(tile_bounds(zoom, x, y))
+    envelope.srid = 4326
+    rows = (
+        queryset
+        .filter(location__bboverlaps=envelope)
+        .order_by()
+        .values(
+            'id', 'title', 'status', 'upvotes',
+            category_name=F('category__name'),
+            geom=AsMVTGeom(Transform('location', 3857), TileEnvelope(zoom, x, y)),
+        )
+    )
+    sql, params = rows.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT ST_AsMVT(tile, %s, 4096, 'geom') FROM ({sql}) AS tile",
+            (TILE_LAYER_NAME, *params),
+        )
+        data = cursor.fetchone()[0]
+    return bytes(data) if data else b''
+
+
+def _tile_version_key(zoom, x, y):
+    return f'issues:tile:{zoom}:{x}:{y}:version'
+
+
+def tile_cache_key(zoom, x, y, filter_key):
+    """
+    Cache key for a rendered tile under one filter set.
+
+    Every tile carries its own version counter, so invalidating it drops
+    the cached copies for all filter sets at once.
+    """
+    version = cache.get(_tile_version_key(zoom, x, y), 0)
+    digest = hashlib.md5(filter_key.encode()).hexdigest()
+    return f'issues:tile:{zoom}:{x}:{y}:{version}:{digest}'
+
+
+def invalidate_tiles(points):
+    """Bump the version of every tile, at every zoom, that contains a point."""
+    keys = set()
+    for point in points:
+        if point is None:
+            continue
+        for zoom in range(settings.ISSUE_TILE_MAX_ZOOM + 1):
+            keys.add(_tile_version_key(zoom, *tile_for_point(point.x, point.y, zoom)))
+
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # No counter yet, or it was evicted: restart from a value that no
+            # previously cached copy of the tile can have been stored under.
+            cache.set(key, time.time_ns(), timeout=None)
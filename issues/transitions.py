@@ -0,0 +1,81 @@
+"""
+Status changes made by authorities, one issue or hundreds at a time.
+
+The change is set-based: one ``UPDATE`` for all the issues, one
+``bulk_create`` for their status history, and notification tasks queued
+per batch of issues rather than per issue. ``Issue.save()`` and its
+``track_status_change`` signal are bypassed, so what that signal does for
+single edits elsewhere is done here for the whole set, and so is the
+signal that keeps the home page counters.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters
+from .caching import bump_generation, bump_jurisdictions
+from .models import Issue, IssueStatusUpdate
+from .tasks import notify_affected_users_bulk, send_status_update_emails
+from .tiles import invalidate_tiles
+
+# Issues per queued notification task
+NOTIFICATION_BATCH_SIZE = 200
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def transition_issues(queryset, new_status, changed_by, note=''):
+    """
+    Move the issues of ``queryset`` to ``new_status``; return the ids changed.
+
+    Issues already in ``new_status`` are left alone. Rows are locked for the
+    duration, so a concurrent transition cannot record a stale old status.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            queryset.exclude(status=new_status)
+            .select_for_update(of=('self',))
+            .order_by('pk')
+            .values_list('pk', 'status', 'location')
+        )
+        if not rows:
+            return []
+        issue_ids = [pk for pk, _, _ in rows]
+
+        changes = {'status': new_status, 'updated_at': now}
+        if new_status == 'resolved':
+            changes['resolved_at'] = now
+        Issue.objects.filter(pk__in=issue_ids).update(**changes)
+
+        IssueStatusUpdate.objects.bulk_create([
+            IssueStatusUpdate(
+                issue_id=pk,
+                changed_by=changed_by,
+                old_status=old_status,
+                new_status=new_status,
+                note=note,
+            )
+            for pk, old_status, _ in rows
+        ])
+        # Categories are unchanged, so their counters net out to zero
+        counters.adjust(counters.moved(
+            [(old_status, None) for _, old_status, _ in rows],
+            [(new_status, None) for _ in rows],
+        ))
+
+        transaction.on_commit(lambda: _after_transition(rows, new_status))
+    return issue_ids
+
+
+def _after_transition(rows, new_status):
+    for batch in _batches(rows, NOTIFICATION_BATCH_SIZE):
+        send_status_update_emails.delay([(pk, old_status, new_status) for pk, old_status, _ in batch])
+        if new_status == 'resolved':
+            notify_affected_users_bulk.delay([pk for pk, _, _ in batch])
+    invalidate_tiles([location for _, _, location in rows])
+    bump_generation()
+    issue_ids = [pk for pk, _, _ in rows]
+    bump_jurisdictions(Issue.objects.filter(pk__in=issue_ids).order_by().values_list('ward', 'zone').distinct())
@@ -0,0 +1,171 @@
+"""
+Upvote toggling.
+
+Membership lives in ``IssueUpvote``, unique per issue and user, so a toggle
+is idempotent: ``Issue.upvotes`` only moves when a row really was inserted
+or deleted. The counter is changed with a single ``UPDATE ... SET upvotes =
+upvotes + n`` that touches no other column, fires no signals and leaves
+``updated_at`` alone.
+
+An issue receiving more than ``UPVOTE_BUFFER_THRESHOLD`` votes within
+``UPVOTE_BUFFER_WINDOW`` seconds is hot: its deltas are accumulated in the
+cache instead, and ``flush_upvotes`` applies all of them in one UPDATE, so
+voters on a viral issue stop queueing on its row lock. Hot issues are
+tracked in a Redis set, so registering one and taking the whole set for a
+flush never race.
+"""
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from locallens.throttling import redis_client
+
+from .caching import bump_generation
+from .models import Issue, IssueUpvote
+from .tiles import invalidate_tiles
+
+PENDING_KEY = 'issues:upvotes:pending'
+PENDING_LOCK_KEY = 'issues:upvotes:pending:lock'
+PENDING_LOCK_TIMEOUT = 5
+
+# A pending marker that outlives a lost registration expires, so the next
+# vote registers the issue again
+PENDING_MARKER_TIMEOUT = 300
+
+
+def _delta_key(issue_id):
+    return f'issues:upvotes:delta:{issue_id}'
+
+
+def _marker_key(issue_id):
+    return f'issues:upvotes:registered:{issue_id}'
+
+
+def _incr(key, delta, timeout=None):
+    cache.add(key, 0, timeout)
+    return cache.incr(key, delta)
+
+
+@contextmanager
+def _pending_lock():
+    # Other cache backends keep the pending list as one value, changed under
+    # this lock. It is held only briefly; a holder that died loses it after
+    # PENDING_LOCK_TIMEOUT, so waiting for it always ends
+    while not cache.add(PENDING_LOCK_KEY, 1, PENDING_LOCK_TIMEOUT):
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        cache.delete(PENDING_LOCK_KEY)
+
+
+def _register(issue_id):
+    if not cache.add(_marker_key(issue_id), 1, PENDING_MARKER_TIMEOUT):
+        return
+    key = cache.make_key(PENDING_KEY)
+    client = redis_client(key)
+    if client is not None:
+        client.sadd(key, issue_id)
+        return
+    with _pending_lock():
+        pending = cache.get(PENDING_KEY, [])
+        pending.append(issue_id)
+        cache.set(PENDING_KEY, pending, None)
+
+
+def _take_pending():
+    key = cache.make_key(PENDING_KEY)
+    client = redis_client(key)
+    if client is not None:
+        # Read and clear in one MULTI, so no registration falls in between
+        pipe = client.pipeline()
+        pipe.smembers(key)
+        pipe.delete(key)
+        members, _ = pipe.execute()
+        return {int(member) for member in members}
+    with _pending_lock():
+        issue_ids = set(cache.get(PENDING_KEY, []))
+        cache.delete(PENDING_KEY)
+    return issue_ids
+
+
+def _is_hot(issue_id):
+    window = settings.UPVOTE_BUFFER_WINDOW
+    key = f'issues:upvotes:rate:{issue_id}:{int(time.time() // window)}'
+    return _incr(key, 1, window * 2) > settings.UPVOTE_BUFFER_THRESHOLD
+
+
+def _apply(issue, delta):
+    if _is_hot(issue.pk):
+        _incr(_delta_key(issue.pk), delta)
+        _register(issue.pk)
+    else:
+        Issue.objects.filter(pk=issue.pk).update(upvotes=F('upvotes') + delta)
+        # Tiles carry the vote count, and update() skips the signal that
+        # invalidates them
+        invalidate_tiles([issue.location])
+        bump_generation()
+
+
+def current_upvotes(issue_id):
+    """The stored count plus any votes still buffered for the issue."""
+    stored = Issue.objects.values_list('upvotes', flat=True).get(pk=issue_id)
+    return stored + (cache.get(_delta_key(issue_id)) or 0)
+
+
+def toggle_upvote(issue, user):
+    """
+    Add ``user``'s upvote to ``issue``, or remove it if present.
+
+    Returns ``(added, upvotes)``.
+    """
+    if IssueUpvote.objects.filter(issue=issue, user=user).delete()[0]:
+        added, delta = False, -1
+    else:
+        try:
+            with transaction.atomic():
+                IssueUpvote.objects.create(issue=issue, user=user)
+            added, delta = True, 1
+        except IntegrityError:
+            # A concurrent request from the same user added it first
+            added, delta = True, 0
+
+    if delta:
+        _apply(issue, delta)
+    return added, current_upvotes(issue.pk)
+
+
+def flush_upvotes():
+    """Apply buffered upvote deltas in a single UPDATE; return issues updated."""
+    issue_ids = _take_pending()
+
+    deltas = {}
+    for issue_id in issue_ids:
+        # Clear the marker first: a vote arriving after this re-registers the
+        # issue, one arriving before is included in the amount claimed below
+        cache.delete(_marker_key(issue_id))
+        delta = cache.get(_delta_key(issue_id)) or 0
+        if delta:
+            cache.incr(_delta_key(issue_id), -delta)
+            deltas[issue_id] = delta
+    if not deltas:
+        return 0
+
+    try:
+        updated = Issue.objects.filter(pk__in=deltas).update(upvotes=F('upvotes') + Case(
+            *[When(pk=issue_id, then=Value(delta)) for issue_id, delta in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+    except Exception:
+        # Hand the claimed votes back for the next flush
+        for issue_id, delta in deltas.items():
+            _incr(_delta_key(issue_id), delta)
+            _register(issue_id)
+        raise
+    invalidate_tiles(Issue.objects.filter(pk__in=deltas).values_list('location', flat=True))
+    bump_generation()
+    return updated
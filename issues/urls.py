@@ -6,6 +6,7 @@ urlpatterns = [
     path('report/', views.report_issue, name='report_issue'),
     path('issue/<int:pk>/', views.issue_detail, name='issue_detail'),
     path('map/', views.issue_map, name='issue_map'),
+    path('tiles/<int:z>/<int:x>/<int:y>.mvt', views.issue_tiles, name='issue_tiles'),
     path('issue/<int:pk>/upvote/', views.upvote_issue, name='upvote_issue'),
     path('issue/<int:pk>/affected/', views.mark_affected, name='mark_affected'),
 ]
\ No newline at end of file
@@ -1,21 +1,30 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Q, Count
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse
+from django.db.models import Q
 from django.utils import timezone
+from locallens.throttling import throttle
+from . import counters
 from .models import Issue, IssueCategory, IssueUpvote, IssueComment, AffectedUser
 from .forms import IssueReportForm, IssueCommentForm, IssueFilterForm
-from django.utils.safestring import mark_safe
-import json
+from .spatial import is_valid_tile
+from .tiles import render_tile, tile_cache_key
+from .upvotes import toggle_upvote
 
 def home(request):
     recent_issues = Issue.objects.filter(privacy='public', is_duplicate=False)[:6]
-    categories = IssueCategory.objects.annotate(issue_count=Count('issues'))
+    # Totals come from the counters table rather than counting issues
+    totals = counters.snapshot()
+    categories = list(IssueCategory.objects.all())
+    for category in categories:
+        category.issue_count = totals.get(counters.category_key(category.pk), 0)
     stats = {
-        'total_issues': Issue.objects.count(),
-        'resolved_issues': Issue.objects.filter(status='resolved').count(),
-        'pending_issues': Issue.objects.filter(status='pending').count(),
+        'total_issues': totals.get(counters.TOTAL, 0),
+        'resolved_issues': totals.get(counters.status_key('resolved'), 0),
+        'pending_issues': totals.get(counters.status_key('pending'), 0),
     }
     return render(request, 'issues/home.html', {
         'recent_issues': recent_issues,
@@ -25,6 +34,7 @@ def home(request):
 
 
 @login_required
+@throttle('report')
 def report_issue(request):
     if request.method == 'POST':
         form = IssueReportForm(request.POST, request.FILES)
@@ -80,64 +90,42 @@ def issue_detail(request, pk):
 
 def issue_map(request):
     filter_form = IssueFilterForm(request.GET)
-    issues = Issue.objects.filter(privacy='public', is_duplicate=False)
-
-    if filter_form.is_valid():
-        if filter_form.cleaned_data.get('category'):
-            issues = issues.filter(category=filter_form.cleaned_data['category'])
-        if filter_form.cleaned_data.get('status'):
-            issues = issues.filter(status=filter_form.cleaned_data['status'])
-        if filter_form.cleaned_data.get('date_from'):
-            issues = issues.filter(created_at__gte=filter_form.cleaned_data['date_from'])
-        if filter_form.cleaned_data.get('date_to'):
-            issues = issues.filter(created_at__lte=filter_form.cleaned_data['date_to'])
-
-    # Convert to JSON manually
-    issues_data = [
-        {
-            "id": issue.id,
-            "title": issue.title,
-            "description": issue.description,
-            "category_name": issue.category.name,
-            "reporter_username": issue.reporter.username,
-            "address": issue.address,
-            "image": issue.image.url if issue.image else None,
-            "status": issue.status,
-            "lat": issue.location.y if issue.location else None,
-            "lng": issue.location.x if issue.location else None,
-            "upvote_count": issue.upvotes,
-            "comment_count": issue.comments.count(),
-            "created_at": issue.created_at.isoformat(),
-        }
-        for issue in issues
-    ]
-
     return render(request, 'issues/issue_map.html', {
-        'issues_json': mark_safe(json.dumps(issues_data)),
         'filter_form': filter_form,
+        'cluster_max_zoom': settings.ISSUE_CLUSTER_MAX_ZOOM,
     })
 
 
+def issue_tiles(request, z, x, y):
+    if z > settings.ISSUE_TILE_MAX_ZOOM or not is_valid_tile(z, x, y):
+        raise Http404('Tile out of range')
+    
+    filter_form = IssueFilterForm(request.GET)
+    cache_key = tile_cache_key(z, x, y, filter_form.cache_key())
+    tile = cache.get(cache_key)
+    if tile is None:
+        issues = filter_form.filter_queryset(
+            Issue.objects.filter(privacy='public', is_duplicate=False)
+        )
+        tile = render_tile(issues, z, x, y)
+        cache.set(cache_key, tile, settings.ISSUE_TILE_CACHE_TIMEOUT)
+    
+    return HttpResponse(tile, content_type='application/vnd.mapbox-vector-tile')
+
+
 @login_required
+@throttle('vote')
 def upvote_issue(request, pk):
     if request.method == 'POST':
         issue = get_object_or_404(Issue, pk=pk)
-        upvote, created = IssueUpvote.objects.get_or_create(issue=issue, user=request.user)
-        
-        if not created:
-            upvote.delete()
-            issue.upvotes -= 1
-            issue.save()
-            return JsonResponse({'status': 'removed', 'upvotes': issue.upvotes})
-        else:
-            issue.upvotes += 1
-            issue.save()
-            return JsonResponse({'status': 'added', 'upvotes': issue.upvotes})
+        added, upvotes = toggle_upvote(issue, request.user)
+        return JsonResponse({'status': 'added' if added else 'removed', 'upvotes': upvotes})
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 
 @login_required
+@throttle('vote')
 def mark_affected(request, pk):
     if request.method == 'POST':
         issue = get_object_or_404(Issue, pk=pk)
@@ -145,8 +133,10 @@ def mark_affected(request, pk):
         
         if not created:
             affected.delete()
-            return JsonResponse({'status': 'removed', 'count': issue.affected_users.count()})
-        else:
-            return JsonResponse({'status': 'added', 'count': issue.affected_users.count()})
+        issue.refresh_from_db(fields=['affected_count'])
+        return JsonResponse({
+            'status': 'added' if created else 'removed',
+            'count': issue.affected_count
+        })
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
@@ -14,6 +14,30 @@ app.conf.beat_schedule = {
         'task': 'issues.tasks.send_daily_digest',
         'schedule': crontab(hour=9, minute=0),
     },
+    'flush-upvotes': {
+        'task': 'issues.tasks.flush_upvotes',
+        'schedule': 10.0,  # seconds; buffered votes show up within this
+    },
+    'build-heatmaps': {
+        'task': 'issues.tasks.build_heatmaps',
+        'schedule': crontab(minute='*/30'),
+    },
+    'detect-hotspots': {
+        'task': 'issues.tasks.detect_hotspots',
+        'schedule': crontab(minute=15),
+    },
+    'prune-sync-tombstones': {
+        'task': 'issues.tasks.prune_sync_tombstones',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    'reconcile-engagement-counts': {
+        'task': 'issues.tasks.reconcile_engagement_counts',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'recount-issue-counters': {
+        'task': 'issues.tasks.recount_issue_counters',
+        'schedule': crontab(minute=45),
+    },
     'cleanup-old-notifications': {
         'task': 'notifications.tasks.cleanup_old_notifications',
         'schedule': crontab(hour=0, minute=0),
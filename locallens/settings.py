@@ -16,6 +16,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
     
     # Third party
     'rest_framework',
@@ -128,6 +129,89 @@ LEAFLET_CONFIG = {
     'ATTRIBUTION_PREFIX': 'Powered by LocalLens',
 }
 
+# Vector tiles for the issue map
+ISSUE_TILE_MAX_ZOOM = config('ISSUE_TILE_MAX_ZOOM', default=18, cast=int)
+ISSUE_TILE_CACHE_TIMEOUT = config('ISSUE_TILE_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Server-side clustering for the map API, used up to and including this zoom
+ISSUE_CLUSTER_MAX_ZOOM = config('ISSUE_CLUSTER_MAX_ZOOM', default=12, cast=int)
+ISSUE_CLUSTER_CELLS_PER_TILE = config('ISSUE_CLUSTER_CELLS_PER_TILE', default=4, cast=int)
+
+# Individual points returned by the map API per viewport
+ISSUE_MAP_DEFAULT_LIMIT = config('ISSUE_MAP_DEFAULT_LIMIT', default=500, cast=int)
+ISSUE_MAP_MAX_LIMIT = config('ISSUE_MAP_MAX_LIMIT', default=2000, cast=int)
+
+# Duplicate suggestions when reporting: open issues of the same category
+# within this many metres, reported in the last this many days
+DUPLICATE_SEARCH_RADIUS = config('DUPLICATE_SEARCH_RADIUS', default=200, cast=int)
+DUPLICATE_SEARCH_DAYS = config('DUPLICATE_SEARCH_DAYS', default=30, cast=int)
+
+# Seconds between checks for edited ward/zone boundaries in each process
+BOUNDARY_INDEX_RECHECK = config('BOUNDARY_INDEX_RECHECK', default=60, cast=int)
+
+# Fall back to trigram similarity on titles when a search has no
+# full-text matches, so misspelt searches still find something
+ISSUE_SEARCH_TRIGRAM_FALLBACK = config('ISSUE_SEARCH_TRIGRAM_FALLBACK', default=True, cast=bool)
+
+# Upvotes: an issue getting more than UPVOTE_BUFFER_THRESHOLD votes in
+# UPVOTE_BUFFER_WINDOW seconds has its count buffered in the cache and
+# written by the flush_upvotes task instead of on every vote
+UPVOTE_BUFFER_THRESHOLD = config('UPVOTE_BUFFER_THRESHOLD', default=20, cast=int)
+UPVOTE_BUFFER_WINDOW = config('UPVOTE_BUFFER_WINDOW', default=10, cast=int)
+
+# Seconds a serialized issues API response stays in the shared cache; any
+# issue write makes cached copies stale sooner
+ISSUE_API_CACHE_TIMEOUT = config('ISSUE_API_CACHE_TIMEOUT', default=300, cast=int)
+
+# Serve the issue list and map_data as values() rows through
+# issues.fastpath instead of the DRF serializers
+ISSUE_API_FAST_PATH = config('ISSUE_API_FAST_PATH', default=True, cast=bool)
+
+# Token-bucket throttles: requests allowed per period for each endpoint
+# class, per user (per IP when anonymous) and, more generously as users
+# can share an address, per IP
+THROTTLE_RATES = {
+    'vote': config('THROTTLE_VOTE_RATE', default='60/min'),
+    'report': config('THROTTLE_REPORT_RATE', default='20/hour'),
+    'expensive': config('THROTTLE_EXPENSIVE_RATE', default='30/min'),
+}
+THROTTLE_IP_RATES = {
+    'vote': config('THROTTLE_VOTE_IP_RATE', default='300/min'),
+    'report': config('THROTTLE_REPORT_IP_RATE', default='100/hour'),
+    'expensive': config('THROTTLE_EXPENSIVE_IP_RATE', default='120/min'),
+}
+
+# Expensive requests (exports, statistics, bulk operations) allowed to run
+# at once across all workers; more are shed with 503 and this Retry-After
+CONCURRENCY_LIMITS = {
+    'expensive': config('CONCURRENCY_LIMIT_EXPENSIVE', default=8, cast=int),
+}
+CONCURRENCY_RETRY_AFTER = config('CONCURRENCY_RETRY_AFTER', default=5, cast=int)
+
+# Authority dashboard figures, cached per ward/zone: seconds an entry is
+# kept, and seconds a stale entry may still be served while one request
+# recomputes it
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=3600, cast=int)
+DASHBOARD_CACHE_MAX_STALENESS = config('DASHBOARD_CACHE_MAX_STALENESS', default=60, cast=int)
+
+# Seconds a user's cached unread notification count is kept before it is
+# counted again
+NOTIFICATION_UNREAD_COUNT_TIMEOUT = config('NOTIFICATION_UNREAD_COUNT_TIMEOUT', default=3600, cast=int)
+
+# Incremental sync: page size, seconds a change must age before it is
+# handed out, and days deletions are remembered for
+ISSUE_SYNC_PAGE_SIZE = config('ISSUE_SYNC_PAGE_SIZE', default=500, cast=int)
+ISSUE_SYNC_MAX_PAGE_SIZE = config('ISSUE_SYNC_MAX_PAGE_SIZE', default=2000, cast=int)
+ISSUE_SYNC_LAG = config('ISSUE_SYNC_LAG', default=2, cast=int)
+ISSUE_SYNC_RETENTION_DAYS = config('ISSUE_SYNC_RETENTION_DAYS', default=30, cast=int)
+
+# Hotspot detection over open issues reported in the last HOTSPOT_WINDOW_DAYS:
+# at least HOTSPOT_MIN_ISSUES issues of one category within HOTSPOT_EPS_METERS
+# of each other
+HOTSPOT_WINDOW_DAYS = config('HOTSPOT_WINDOW_DAYS', default=90, cast=int)
+HOTSPOT_EPS_METERS = config('HOTSPOT_EPS_METERS', default=100, cast=int)
+HOTSPOT_MIN_ISSUES = config('HOTSPOT_MIN_ISSUES', default=5, cast=int)
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -137,6 +221,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'issues.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'locallens.throttling.TokenBucketThrottle',
+    ],
+    # Reverse proxies in front of the app; throttles key on the address the
+    # last of them saw, or on REMOTE_ADDR with none, never on what a client
+    # puts in X-Forwarded-For
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -0,0 +1,260 @@
+"""
+Per-client throttling and admission control.
+
+Throttles are token buckets kept in the Redis cache, one per endpoint
+class (``THROTTLE_RATES``), checked both per user (per IP when anonymous)
+and per IP. A bucket holds the whole allowance for its period and refills
+continuously, so a client may burst up to its allowance but cannot keep
+up more than the rate. Refused requests get 429 with ``Retry-After``.
+
+Expensive requests (exports, statistics, bulk operations) also go through
+a limiter on how many run at once across all workers
+(``CONCURRENCY_LIMITS``). Past the limit they are shed with 503 and
+``Retry-After`` before they reach the database, instead of queueing on it.
+
+Every refused request is counted; see ``manage.py throttle_stats``.
+"""
+import asyncio
+import math
+import time
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+
+SHED_KEY = 'throttling:shed:{reason}:{scope}'
+SHED_REASONS = ['throttled', 'busy']
+
+# Seconds an in-flight slot is held at most, so a worker that died
+# mid-request cannot hold it forever
+CONCURRENCY_KEY_TIMEOUT = 300
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Refill the bucket, then take a token if there is one; atomic in Redis
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+# Slots are members of a sorted set scored by their expiry: drop the expired
+# ones, then add one if there is room; atomic in Redis
+_ACQUIRE_SLOT_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[4])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+
+def parse_rate(rate):
+    """``'30/min'`` to ``(30, 60)``: requests and seconds."""
+    count, period = rate.split('/')
+    return int(count), _PERIODS[period[0]]
+
+
+def redis_client(key):
+    """
+    The Redis client holding ``key`` (already made with ``cache.make_key``),
+    or None. Django's RedisCache; other backends (tests use locmem) take the
+    non-atomic path.
+    """
+    client = getattr(cache, '_cache', None)
+    return client.get_client(key, write=True) if hasattr(client, 'get_client') else None
+
+
+def take_token(key, rate):
+    """Take a token from the bucket ``key``; return None, or seconds to wait."""
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    now = time.time()
+    cache_key = cache.make_key(f'throttling:bucket:{key}')
+
+    client = redis_client(cache_key)
+    if client is not None:
+        allowed, tokens = client.eval(_TOKEN_BUCKET_SCRIPT, 1, cache_key, capacity, refill, now)
+        tokens = float(tokens)
+    else:
+        tokens, ts = cache.get(f'throttling:bucket:{key}', (capacity, now))
+        tokens = min(capacity, tokens + max(0, now - ts) * refill)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        cache.set(f'throttling:bucket:{key}', (tokens, now), math.ceil(period) + 1)
+
+    if allowed:
+        return None
+    return math.ceil((1 - tokens) / refill)
+
+
+def record_shed(reason, scope):
+    key = SHED_KEY.format(reason=reason, scope=scope)
+    cache.add(key, 0, None)
+    cache.incr(key)
+
+
+def shed_counts():
+    """``{(reason, scope): count}`` of requests refused so far."""
+    scopes = set(settings.THROTTLE_RATES) | set(settings.CONCURRENCY_LIMITS)
+    keys = {SHED_KEY.format(reason=reason, scope=scope): (reason, scope) for reason in SHED_REASONS for scope in scopes}
+    counts = cache.get_many(list(keys))
+    return {keys[key]: counts.get(key, 0) for key in keys}
+
+
+def client_keys(request):
+    """The buckets a request is charged to, with the rate table of each."""
+    ip = BaseThrottle().get_ident(request)
+    user = getattr(request, 'user', None)
+    client = f'user:{user.pk}' if user is not None and user.is_authenticated else f'anon:{ip}'
+    return [(client, settings.THROTTLE_RATES), (f'ip:{ip}', settings.THROTTLE_IP_RATES)]
+
+
+def check_throttle(request, scope):
+    """Charge ``request`` to ``scope``'s buckets; return None, or seconds to wait."""
+    for key, rates in client_keys(request):
+        wait = take_token(f'{scope}:{key}', rates[scope])
+        if wait is not None:
+            record_shed('throttled', scope)
+            return wait
+    return None
+
+
+def _refused(status, message, retry_after):
+    response = JsonResponse({'detail': message}, status=status)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def too_many_requests(retry_after):
+    return _refused(429, f'Request was throttled. Expected available in {retry_after} seconds.', retry_after)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle for views with a ``throttle_scopes`` map from action to
+    endpoint class; actions not in the map are not throttled.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scopes', {}).get(getattr(view, 'action', None))
+        if scope is None:
+            return True
+        self.retry_after = check_throttle(request, scope)
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+def throttle(scope, methods=('POST',)):
+    """Throttle a Django view's ``methods`` requests as endpoint class ``scope``."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = check_throttle(request, scope)
+                if retry_after is not None:
+                    return too_many_requests(retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _acquire(scope):
+    """Take an in-flight slot of ``scope``; return it, or None when all are taken."""
+    key = f'throttling:inflight:{scope}'
+    limit = settings.CONCURRENCY_LIMITS[scope]
+    cache_key = cache.make_key(key)
+    client = redis_client(cache_key)
+    if client is not None:
+        slot = uuid.uuid4().hex
+        if client.eval(_ACQUIRE_SLOT_SCRIPT, 1, cache_key, time.time(), limit, CONCURRENCY_KEY_TIMEOUT, slot):
+            return slot
+    else:
+        # A plain counter; its timeout is set when it is created and never
+        # extended, so leaked slots are dropped with it
+        cache.add(key, 0, CONCURRENCY_KEY_TIMEOUT)
+        if cache.incr(key) <= limit:
+            return key
+        _release(scope, key)
+    record_shed('busy', scope)
+    return None
+
+
+def _release(scope, slot):
+    key = f'throttling:inflight:{scope}'
+    cache_key = cache.make_key(key)
+    client = redis_client(cache_key)
+    if client is not None:
+        client.zrem(cache_key, slot)
+        return
+    try:
+        cache.decr(key)
+    except ValueError:
+        # Expired while the request ran
+        pass
+
+
+def _busy():
+    return _refused(503, 'Server busy, please retry.', settings.CONCURRENCY_RETRY_AFTER)
+
+
+def limit_concurrency(scope):
+    """
+    Shed calls to a view (function, DRF method or async) beyond
+    ``CONCURRENCY_LIMITS[scope]`` running at once. Streaming responses
+    hold their slot until fully sent.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                slot = await sync_to_async(_acquire)(scope)
+                if slot is None:
+                    return _busy()
+                try:
+                    return await view(*args, **kwargs)
+                finally:
+                    await sync_to_async(_release)(scope, slot)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            slot = _acquire(scope)
+            if slot is None:
+                return _busy()
+            try:
+                response = view(*args, **kwargs)
+            except BaseException:
+                _release(scope, slot)
+                raise
+            if getattr(response, 'streaming', False):
+                # Released by close(), which the server calls once the body
+                # is sent or the client has gone
+                response._resource_closers.append(lambda: _release(scope, slot))
+            else:
+                _release(scope, slot)
+            return response
+        return wrapper
+    return decorator
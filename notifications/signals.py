@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from . import unread
+from .models import Notification
+
+@receiver(post_save, sender=Notification)
+def count_unread_created(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        # On commit, so a rolled back notification is never counted
+        transaction.on_commit(lambda: unread.adjust(instance.recipient_id, 1))
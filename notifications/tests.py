@@ -1,3 +1,52 @@
-from django.test import TestCase
+from datetime import timedelta
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from .models import Notification
+from .tasks import cleanup_old_notifications
+from .unread import unread_count
 
-# Create your tests here.
+User = get_user_model()
+
+class UnreadCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+    
+    def _notify(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                recipient=self.user,
+                notification_type='issue_updated',
+                title='Issue Updated',
+                message='Test message'
+            )
+    
+    def test_unread_count_follows_notifications(self):
+        first = self._notify()
+        self.assertEqual(unread_count(self.user), 1)
+        self._notify()
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user), 2)
+        
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(f'/notifications/{first.pk}/read/')
+        self.client.get(f'/notifications/{first.pk}/read/')
+        self.assertEqual(unread_count(self.user), 1)
+        self.assertEqual(self.client.get('/notifications/unread-count/').json(), {'unread_count': 1})
+        
+        self.client.post('/notifications/mark-all-read/')
+        self.assertEqual(unread_count(self.user), 0)
+    
+    def test_cleanup_deletes_in_one_query(self):
+        old = self._notify()
+        Notification.objects.filter(pk=old.pk).update(is_read=True, created_at=timezone.now() - timedelta(days=31))
+        self._notify()
+        with self.assertNumQueries(1):
+            cleanup_old_notifications()
+        self.assertEqual(Notification.objects.count(), 1)
@@ -0,0 +1,55 @@
+"""
+Per-user unread notification counts, kept in the cache.
+
+Every page render shows the count, so it is read from the cache rather
+than counted: creating an unread notification increments it, reading one
+decrements it and marking all read drops it. A missing count is rebuilt
+from the database on the next read, and every count expires after
+``NOTIFICATION_UNREAD_COUNT_TIMEOUT`` seconds, which bounds any drift.
+
+Deletes are not counted: the cleanup task only deletes read
+notifications, and a ``post_delete`` receiver would make its bulk
+delete fetch and signal every row instead of issuing one DELETE.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _count(user_id):
+    return Notification.objects.filter(recipient_id=user_id, is_read=False)
+
+
+def unread_count(user):
+    count = cache.get(_key(user.pk))
+    if count is None:
+        count = _count(user.pk).count()
+        cache.add(_key(user.pk), count, settings.NOTIFICATION_UNREAD_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+async def aunread_count(user):
+    count = await cache.aget(_key(user.pk))
+    if count is None:
+        count = await _count(user.pk).acount()
+        await cache.aadd(_key(user.pk), count, settings.NOTIFICATION_UNREAD_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+def adjust(user_id, delta):
+    try:
+        cache.incr(_key(user_id), delta)
+    except ValueError:
+        # Not cached; the next read counts it
+        pass
+
+
+def reset(user_id):
+    # Dropped rather than set to zero, so a notification created meanwhile
+    # is not lost: the next read counts it
+    cache.delete(_key(user_id))
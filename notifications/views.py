@@ -1,12 +1,15 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.http import JsonResponse
+from issues.async_views import aget_user
+from . import unread
 from .models import Notification
 
 @login_required
 def notification_list(request):
     notifications = request.user.notifications.all()[:20]
-    unread_count = request.user.notifications.filter(is_read=False).count()
+    unread_count = unread.unread_count(request.user)
     
     context = {
         'notifications': notifications,
@@ -18,8 +21,9 @@ def notification_list(request):
 @login_required
 def mark_as_read(request, pk):
     notification = get_object_or_404(Notification, pk=pk, recipient=request.user)
-    notification.is_read = True
-    notification.save()
+    # Only the request that flips it to read takes it off the count
+    if Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True):
+        unread.adjust(request.user.pk, -1)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'status': 'success'})
@@ -31,11 +35,15 @@ def mark_as_read(request, pk):
 def mark_all_read(request):
     if request.method == 'POST':
         request.user.notifications.filter(is_read=False).update(is_read=True)
+        unread.reset(request.user.pk)
         return JsonResponse({'status': 'success'})
     return JsonResponse({'status': 'error'}, status=400)
 
 
-@login_required
-def get_unread_count(request):
-    count = request.user.notifications.filter(is_read=False).count()
-    return JsonResponse({'unread_count': count})
\ No newline at end of file
+async def get_unread_count(request):
+    # Async, as it is polled by every open page; login_required only wraps
+    # sync views before Django 5
+    user = await aget_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    return JsonResponse({'unread_count': await unread.aunread_count(user)})
\ No newline at end of file